@@ -1,15 +1,22 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template
 from flask_cors import CORS
-from scrapers.amazon import scrape_amazon
-from scrapers.flipkart import scrape_flipkart
-from scrapers.meesho import scrape_meesho
-from scrapers.indiamart import scrape_indiamart
-from recommender import get_recommendations
+from search_service import (
+    CACHE, FLIGHTS, SCRAPERS, breaker_states, index_stored_products, iter_search, run_search, warm_drivers,
+)
+from jobs import JobQueue, create_job_store
+from history import SearchHistory
+from catalog import CATALOG_PAGE_SIZE, Catalog, decode_cursor, encode_cursor
+from scrapers.driver_binaries import resolve_chromedriver
+from scrapers.resource_blocking import page_weight_report
+from scrapers.http_fetch import tier_stats
+from spelling import SPELLER
+from metrics import CONTENT_TYPE, METRICS_ENABLED, REQUEST_SECONDS, render as render_metrics
+from utils import correct_spelling
 import logging
 import os
-import csv
-from datetime import datetime
-import pandas as pd
+import json
+import threading
+import time
 
 # ✅ Corrected __name__ and static/template paths
 app = Flask(__name__, template_folder='./templates', static_folder='../static')
@@ -18,8 +25,8 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 🔒 History file path
-HISTORY_FILE = os.path.join(os.getcwd(), "search_history.csv")
+# 📜 Search history, written in batches by a background thread
+HISTORY = SearchHistory()
 
 # ✅ CSV files to load products from
 CSV_FILES = [
@@ -29,43 +36,50 @@ CSV_FILES = [
     "products.csv"
 ]
 
-def save_search_query(query):
-    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-    with open(HISTORY_FILE, mode='a', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow([datetime.now().strftime("%Y-%m-%d %H:%M:%S"), query])
-
-def load_search_history():
-    if not os.path.exists(HISTORY_FILE):
-        return []
-    with open(HISTORY_FILE, mode='r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        return [{"time": row[0], "query": row[1]} for row in reader]
-
-# ✅ Load product data from all CSV files
-def load_csv_products():
-    products = []
-    for file_name in CSV_FILES:
-        if os.path.exists(file_name):
-            try:
-                df = pd.read_csv(file_name)
-                for _, row in df.iterrows():
-                    products.append({
-                        "title": row.get("title", "No Title"),
-                        "price": row.get("price", "N/A"),
-                        "rating": row.get("rating", "N/A"),
-                        "link": row.get("link", "#"),
-                        "image": row.get("image", "/static/default.jpg")  # default image fallback
-                    })
-            except Exception as e:
-                logger.error(f"Failed to load {file_name}: {e}")
-    return products
+# 📦 Products for the home page, loaded once and re-read only when a CSV changes
+CATALOG = Catalog(CSV_FILES)
+CATALOG.refresh(force=True)
+
+# 🧵 Background search jobs for /search/jobs
+JOBS = JobQueue(create_job_store(), iter_search, list(SCRAPERS) + ["recommendations", "comparisons"])
 
 @app.route("/")
 def index():
-    history = load_search_history()
-    products = load_csv_products()  # ✅ Load products from CSVs
-    return render_template("index.html", history=history, products=products)
+    history = HISTORY.recent()
+    # Only the first page is rendered; the rest is fetched from /products on scroll
+    products, next_position, _ = CATALOG.page(limit=CATALOG_PAGE_SIZE)
+    next_cursor = encode_cursor(next_position) if next_position is not None else ""
+    return render_template("index.html", history=history, products=products, next_cursor=next_cursor)
+
+@app.route("/products")
+def products():
+    """Catalog page: ?cursor=&limit=&site=&fields=title,price,..."""
+    fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()]
+    try:
+        position = decode_cursor(request.args.get("cursor", ""))
+        limit = int(request.args.get("limit", CATALOG_PAGE_SIZE))
+        items, next_position, total = CATALOG.page(
+            position, limit, site=request.args.get("site") or None, fields=fields
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "items": items,
+        "next_cursor": encode_cursor(next_position) if next_position is not None else None,
+        "total": total,
+    })
+
+def spell_check(data):
+    """``(original, query to search, suggestion)`` for a search request.
+
+    Only confident corrections are searched; ``"exact": true`` searches the
+    query as typed, e.g. after the user turned a correction down.
+    """
+    original = " ".join(data.get("query", "").lower().split())
+    if data.get("exact"):
+        return original, original, None
+    query, suggestion = correct_spelling(original)
+    return original, query or original, suggestion
 
 @app.route("/search", methods=["POST"])
 def search():
@@ -75,64 +89,119 @@ def search():
     if not query.strip():
         return jsonify({"error": "Query is required"}), 400
 
-    query = query.strip().lower()
-    save_search_query(query)
+    original, query, suggestion = spell_check(data)
+    HISTORY.record(original)
     logger.info(f"🔍 Searching for: {query}")
 
-    results = {
-        "amazon": [],
-        "flipkart": [],
-        "meesho": [],
-        "indiamart": [],
-        "recommendations": [],
-        "errors": {}
-    }
+    results = run_search(query)
+    results["corrected_query"] = query if query != original else None
+    results["suggested_query"] = suggestion
+    return jsonify(results)
 
-    try:
-        results["amazon"] = scrape_amazon(query)
-    except Exception as e:
-        logger.error(f"❌ Amazon scraper failed: {e}")
-        results["errors"]["amazon"] = str(e)
+@app.route("/search/stream", methods=["POST"])
+def search_stream():
+    """Same search as /search, sent as NDJSON: one line per site as it finishes."""
+    data = request.get_json()
+    query = data.get("query", "")
 
-    try:
-        results["flipkart"] = scrape_flipkart(query)
-    except Exception as e:
-        logger.error(f"❌ Flipkart scraper failed: {e}")
-        results["errors"]["flipkart"] = str(e)
+    if not query.strip():
+        return jsonify({"error": "Query is required"}), 400
 
-    try:
-        results["meesho"] = scrape_meesho(query)
-    except Exception as e:
-        logger.error(f"❌ Meesho scraper failed: {e}")
-        results["errors"]["meesho"] = str(e)
+    original, query, suggestion = spell_check(data)
+    HISTORY.record(original)
+    logger.info(f"🔍 Streaming search for: {query}")
 
-    try:
-        results["indiamart"] = scrape_indiamart(query)
-    except Exception as e:
-        logger.error(f"❌ IndiaMART scraper failed: {e}")
-        results["errors"]["indiamart"] = str(e)
+    def events():
+        if query != original or suggestion:
+            yield json.dumps({
+                "corrected_query": query if query != original else None,
+                "suggested_query": suggestion,
+            }) + "\n"
+        for name, items, error in iter_search(query):
+            yield json.dumps({"source": name, "items": items, "error": error}) + "\n"
+        yield json.dumps({"done": True}) + "\n"
 
-    try:
-        results["recommendations"] = get_recommendations(query)
-    except Exception as e:
-        logger.error(f"❌ Recommender failed: {e}")
-        results["errors"]["recommendations"] = str(e)
+    return Response(events(), mimetype="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
 
-    return jsonify(results)
+@app.route("/search/jobs", methods=["POST"])
+def create_search_job():
+    data = request.get_json()
+    query = data.get("query", "")
+
+    if not query.strip():
+        return jsonify({"error": "Query is required"}), 400
+
+    original, query, suggestion = spell_check(data)
+    HISTORY.record(original)
+    job = JOBS.submit(query)
+    logger.info(f"🧵 Queued search job {job['id']} for: {query}")
+    return jsonify({
+        "id": job["id"],
+        "status": job["status"],
+        "url": f"/search/jobs/{job['id']}",
+        "corrected_query": query if query != original else None,
+        "suggested_query": suggestion,
+    }), 202
+
+@app.route("/search/jobs/<job_id>")
+def get_search_job(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
 
 @app.route("/clear-history", methods=["POST"])
 def clear_history():
     try:
-        if os.path.exists(HISTORY_FILE):
-            os.remove(HISTORY_FILE)
+        if HISTORY.clear():
             return jsonify({"message": "🧹 Search history cleared."}), 200
         return jsonify({"message": "No history to clear."}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/history")
+def search_history():
+    limit = request.args.get("limit", type=int)
+    return jsonify({"recent": HISTORY.recent(limit), "top": HISTORY.top(request.args.get("top", 10, type=int))})
+
+@app.route("/cache/stats")
+def cache_stats():
+    return jsonify({
+        **CACHE.stats(),
+        "singleflight": FLIGHTS.stats(),
+        "tiers": tier_stats(),
+        "page_weight": page_weight_report(),
+    })
+
+@app.route("/metrics")
+def metrics():
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled, set METRICS_ENABLED=1"}), 404
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            # The route pattern, not the raw path, keeps job ids out of the labels
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint, request.method, str(response.status_code))
+        return response
+
 @app.route("/health")
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({"status": "ok", "sites": breaker_states()})
 
 if __name__ == "__main__":  
+    resolve_chromedriver()  # fail fast when Chrome or ChromeDriver is missing
+    # The debug reloader runs this block twice; only warm browsers in the serving child
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_drivers()
+        SPELLER.current()  # load or build the spelling index before the first search
+        threading.Thread(target=index_stored_products, name="match-index", daemon=True).start()
     app.run(debug=True, host="127.0.0.1", port=5050)
@@ -0,0 +1,244 @@
+"""Offline scraper benchmark.
+
+Serves recorded search pages from a local HTTP server, points every scraper
+at it through its ``<SITE>_BASE_URL`` and prints per-stage timings as JSON::
+
+    python benchmark.py --iterations 5 --output bench.json
+    python benchmark.py --sites amazon --page amazon=amazon_debug.html:503
+
+Run from the backend directory. Scraped rows go to a temporary directory,
+never to the real product CSVs.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import psutil
+except ImportError:  # peak RSS then comes from getrusage alone
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_fixtures")
+SITES = ("amazon", "flipkart", "meesho", "indiamart")
+# Path of each site's search page, below /<site> on the local server
+SEARCH_PATHS = {
+    "amazon": "/s",
+    "flipkart": "/search",
+    "meesho": "/search",
+    "indiamart": "/search.mp",
+}
+STAGES = ("driver_acquire", "driver_start", "page_load", "scroll", "parse", "persist", "total")
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages, port=0):
+        """``pages`` maps a site to ``(path to the HTML file, HTTP status)``."""
+        self.pages = {site: (open(path, "rb").read(), status) for site, (path, status) in pages.items()}
+        self.hits = {site: 0 for site in pages}
+        super().__init__(("127.0.0.1", port), FixtureHandler)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        site, _, rest = self.path.lstrip("/").partition("/")
+        path = "/" + rest.split("?", 1)[0]
+        if site not in self.server.pages or path != SEARCH_PATHS[site]:
+            self.send_error(404)
+            return
+        body, status = self.server.pages[site]
+        self.server.hits[site] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RssSampler:
+    """Peak resident memory of this process and every process it started (Chrome included)."""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_tree_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        me = psutil.Process()
+        while not self._stop.is_set():
+            total = 0
+            for process in [me] + me.children(recursive=True):
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak_tree_mb = max(self.peak_tree_mb, total / (1024 * 1024))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    @staticmethod
+    def peak_self_mb():
+        if resource is None:
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024) if psutil else None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+
+def _summary(samples, errors=0):
+    ms = sorted(seconds * 1000 for seconds in samples)
+    return {
+        "count": len(ms),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_pages(overrides):
+    pages = {site: (os.path.join(FIXTURE_DIR, f"{site}.html"), 200) for site in SITES}
+    for override in overrides:
+        site, _, spec = override.partition("=")
+        path, _, status = spec.partition(":")
+        if site not in SITES or not path:
+            raise SystemExit(f"--page expects SITE=PATH[:STATUS] with SITE one of {', '.join(SITES)}")
+        pages[site] = (path, int(status or 200))
+    return pages
+
+
+def run(sites, query, iterations, pages):
+    server = FixtureServer(pages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    workdir = tempfile.mkdtemp(prefix="scraper-bench-")
+    for site in SITES:
+        os.environ[f"{site.upper()}_BASE_URL"] = f"{server.base_url}/{site}"
+    os.environ["SCRAPER_PAGE_WEIGHT_FILE"] = os.path.join(workdir, "page_weight.json")
+
+    # Imported only now: the scrapers read their base URLs at import time
+    from scrapers import amazon, flipkart, meesho, indiamart
+    from scrapers.driver_pool import POOL
+    from scrapers.product_store import ProductStore
+    from scrapers.stages import StageRecorder
+
+    modules = {"amazon": amazon, "flipkart": flipkart, "meesho": meesho, "indiamart": indiamart}
+    scrapers = {
+        "amazon": amazon.scrape_amazon,
+        "flipkart": flipkart.scrape_flipkart,
+        "meesho": meesho.scrape_meesho,
+        "indiamart": indiamart.scrape_indiamart,
+    }
+    for site in sites:
+        store = modules[site].STORE
+        modules[site].STORE = ProductStore(os.path.join(workdir, f"{site}.csv"), store.fieldnames, store.key_fields)
+
+    recorder = StageRecorder()
+    report = {site: {"results": [], "errors": []} for site in sites}
+    with RssSampler() as rss, recorder.recording():
+        for iteration in range(iterations):
+            for site in sites:
+                started = time.perf_counter()
+                outcome = "ok"
+                try:
+                    results = scrapers[site](query)
+                    report[site]["results"].append(len(results))
+                except Exception as e:
+                    outcome = "error"
+                    report[site]["errors"].append(f"{type(e).__name__}: {e}")
+                    logger.error(f"❌ {site} run {iteration + 1} failed: {e}")
+                recorder(site, "total", time.perf_counter() - started, outcome)
+    POOL.shutdown()
+    server.shutdown()
+
+    for site in sites:
+        samples = recorder.samples.get(site, {})
+        errors = recorder.errors.get(site, {})
+        report[site]["stages"] = {
+            name: _summary(samples[name], errors.get(name, 0))
+            for name in sorted(samples, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES))
+        }
+        report[site]["requests_served"] = server.hits.get(site, 0)
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "query": query,
+        "iterations": iterations,
+        "peak_rss_mb": round(RssSampler.peak_self_mb() or 0, 1),
+        "peak_tree_rss_mb": round(rss.peak_tree_mb, 1) if psutil is not None else None,
+        "sites": report,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against recorded pages.")
+    parser.add_argument("--sites", default=",".join(SITES), help="comma-separated sites to run")
+    parser.add_argument("--query", default="headphones")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--page", action="append", default=[], metavar="SITE=PATH[:STATUS]",
+                        help="serve another recorded page for a site, e.g. amazon=amazon_debug.html:503")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    sites = [site.strip() for site in args.sites.split(",") if site.strip()]
+    unknown = set(sites) - set(SITES)
+    if unknown:
+        parser.error(f"unknown sites: {', '.join(sorted(unknown))}")
+
+    report = run(sites, args.query, args.iterations, _parse_pages(args.page))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import base64
+import binascii
+import io
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from scrapers.normalize import NUMERIC_FIELDS, normalize_frame
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "2"))
+CATALOG_PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "24"))
+CATALOG_MAX_PAGE_SIZE = int(os.getenv("CATALOG_MAX_PAGE_SIZE", "100"))
+
+# Column -> value shown when a CSV lacks the column or leaves the cell empty
+FIELDS = {
+    "title": "No Title",
+    "price": "N/A",
+    "rating": "N/A",
+    "link": "#",
+    "image": "/static/default.jpg",
+}
+# Parsed numbers kept as plain arrays so sorting and filtering stay vectorised.
+# Missing values are -1 in integer columns and NaN in float ones.
+NUMERIC_DTYPES = {
+    "price_paise": np.int64,
+    "rating_value": np.float64,
+    "review_count": np.int64,
+    "valid": np.bool_,
+}
+COLUMNS = (*FIELDS, "site", *NUMERIC_FIELDS)
+
+# Scraper output files and the site each one belongs to
+SITE_FILES = {
+    "amazon_data.csv": "amazon",
+    "flipkart_results.csv": "flipkart",
+    "meesho_data.csv": "meesho",
+    "products.csv": "indiamart",
+}
+
+
+def site_for(path):
+    name = os.path.basename(path)
+    return SITE_FILES.get(name, os.path.splitext(name)[0].split("_")[0])
+
+
+def encode_cursor(position):
+    """Cursor for a ``(file name, row within that file)`` position."""
+    name, row = position
+    return base64.urlsafe_b64encode(json.dumps({"file": name, "row": row}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Position stored in a cursor from ``encode_cursor``, ``None`` for no cursor; ``ValueError`` if it is not one."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+        name, row = position["file"], position["row"]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not isinstance(name, str) or not isinstance(row, int) or row < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return name, row
+
+
+def _empty(name):
+    return np.empty(0, dtype=NUMERIC_DTYPES.get(name, object))
+
+
+def _json_values(name, values):
+    """Column values as a list, with the missing-number markers turned into ``None``."""
+    dtype = NUMERIC_DTYPES.get(name)
+    if dtype is np.float64:
+        return [None if value != value else value for value in values.tolist()]
+    if dtype is np.int64:
+        return [None if value < 0 else value for value in values.tolist()]
+    return values.tolist()
+
+
+class FileRows:
+    """The rows of one scraper CSV, in arrays that grow as rows are appended.
+
+    Arrays are over-allocated, so appending copies only the new rows; readers
+    get ``columns()`` views cut at the row count of the moment, which later
+    appends do not change.
+    """
+
+    # Bytes before the loaded end compared on each check to tell appends from rewrites
+    TAIL_BYTES = 4096
+
+    def __init__(self, path):
+        self.path = path
+        self.site = site_for(path)
+        self.signature = None  # (mtime, size) when last checked
+        self.loaded = 0        # bytes up to the end of the last complete row read
+        self.header = None
+        self.tail = b""
+        self.count = 0
+        self._arrays = {name: _empty(name) for name in COLUMNS}
+
+    def _parse(self, data, header):
+        """Column arrays for the rows of ``data``, which starts with the header when ``header`` is ``None``."""
+        if header is None:
+            header = list(pd.read_csv(io.BytesIO(data), nrows=0).columns)
+            data = data[data.find(b"\n") + 1:]
+        df = pd.read_csv(
+            io.BytesIO(data), dtype=str, header=None, names=header, index_col=False,
+            usecols=lambda column: column in FIELDS or column == "reviews",
+        )
+        columns = {
+            name: (df[name].fillna(default).to_numpy(dtype=object) if name in df
+                   else np.full(len(df), default, dtype=object))
+            for name, default in FIELDS.items()
+        }
+        columns["site"] = np.full(len(df), self.site, dtype=object)
+        numeric = normalize_frame(df)
+        for name, dtype in NUMERIC_DTYPES.items():
+            missing = np.nan if dtype is np.float64 else -1
+            columns[name] = numeric[name].to_numpy(dtype=dtype, na_value=missing)
+        return header, columns
+
+    def _extend(self, columns, reset=False):
+        """Append ``columns`` to the arrays, or replace their contents when ``reset``.
+
+        Rows already handed out in ``columns()`` views are never written to:
+        appends go past them and a reset allocates new arrays.
+        """
+        added = len(columns["site"])
+        count = 0 if reset else self.count
+        needed = count + added
+        for name, values in columns.items():
+            array = self._arrays[name]
+            if reset or needed > len(array):
+                grown = np.empty(max(64, needed + needed // 4, 0 if reset else 2 * len(array)), dtype=array.dtype)
+                grown[:count] = array[:count]
+                self._arrays[name] = array = grown
+            array[count:needed] = values
+        self.count = needed
+
+    def update(self, signature):
+        """Read what changed in the file; ``True`` if the rows changed.
+
+        Bytes past the last complete row are parsed and appended when the
+        file grew and the bytes before that point are untouched; anything
+        else re-reads the whole file.
+        """
+        with open(self.path, "rb") as f:
+            appended = False
+            if self.header is not None and signature[1] >= self.loaded:
+                f.seek(self.loaded - len(self.tail))
+                appended = f.read(len(self.tail)) == self.tail
+            if not appended:
+                f.seek(0)
+            data = f.read()
+        # A row still being written is left for the next check
+        data = data[:data.rfind(b"\n") + 1]
+        if appended:
+            if data:
+                _, columns = self._parse(data, self.header)
+                self._extend(columns)
+            self.loaded += len(data)
+            self.tail = (self.tail + data)[-self.TAIL_BYTES:]
+        else:
+            if data.strip():
+                self.header, columns = self._parse(data, None)
+            else:
+                self.header, columns = None, {name: _empty(name) for name in COLUMNS}
+            self._extend(columns, reset=True)
+            self.loaded = len(data)
+            self.tail = data[-self.TAIL_BYTES:]
+        self.signature = signature
+        return bool(data) or not appended
+
+    def columns(self):
+        return {name: array[:self.count] for name, array in self._arrays.items()}
+
+
+class Catalog:
+    """Product rows from the scraper CSVs, held as arrays per column and file.
+
+    Files are read once. After that, rows appended to a file are parsed and
+    added on their own; a file is only read again in full when it shrank or
+    its earlier bytes changed. Readers always see a complete snapshot.
+    """
+
+    def __init__(self, paths, check_interval=CATALOG_CHECK_INTERVAL):
+        self.paths = list(paths)
+        self.check_interval = check_interval
+        self._files = {path: FileRows(path) for path in self.paths}
+        # Swapped as a whole so readers never mix columns from two loads
+        self._snapshot = self._make_snapshot([])
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_snapshot(parts):
+        """``parts`` holds ``(file index, site, columns)`` for each loaded file, in file order."""
+        return {"parts": parts, "total": sum(len(columns["site"]) for _, _, columns in parts)}
+
+    def _signature(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self, force=False):
+        """Read what changed in the files, at most once per ``check_interval`` seconds."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.check_interval:
+                return
+            changed = False
+            for path, rows in self._files.items():
+                signature = self._signature(path)
+                if signature is None:
+                    if rows.signature is not None:
+                        self._files[path] = FileRows(path)
+                        changed = True
+                    continue
+                if rows.signature == signature:
+                    continue
+                before = rows.count
+                try:
+                    if rows.update(signature):
+                        changed = True
+                        logger.info(f"📦 Catalog loaded {path} ({rows.count - before:+d} rows, {rows.count} in all)")
+                except Exception as e:
+                    logger.error(f"Failed to load {path}: {e}")
+            if changed:
+                self._snapshot = self._make_snapshot([
+                    (i, self._files[path].site, self._files[path].columns())
+                    for i, path in enumerate(self.paths) if self._files[path].count
+                ])
+            self._checked_at = time.monotonic()
+
+    def page(self, position=None, limit=CATALOG_PAGE_SIZE, site=None, fields=None):
+        """One page of rows as plain dicts, starting at ``position``.
+
+        Positions are ``(file name, row within that file)`` pairs, so rows
+        appended to one file never shift the pages of another. ``site`` keeps
+        only that site's rows and ``fields`` limits the keys of each row.
+        Returns ``(items, next_position, total)``; ``next_position`` is
+        ``None`` on the last page.
+        """
+        fields = list(fields or COLUMNS)
+        unknown = [name for name in fields if name not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        limit = max(1, min(limit, CATALOG_MAX_PAGE_SIZE))
+        start_file, start_row = 0, 0
+        if position is not None:
+            names = [os.path.basename(path) for path in self.paths]
+            if position[0] not in names:
+                raise ValueError(f"Unknown file in cursor: {position[0]}")
+            start_file, start_row = names.index(position[0]), position[1]
+
+        self.refresh()
+        parts = [(i, columns) for i, part_site, columns in self._snapshot["parts"] if not site or part_site == site]
+        total = sum(len(columns["site"]) for _, columns in parts)
+
+        items = []
+        next_position = None
+        for i, columns in parts:
+            if i < start_file:
+                continue
+            row = start_row if i == start_file else 0
+            size = len(columns["site"])
+            if len(items) >= limit:
+                if row < size:
+                    next_position = (os.path.basename(self.paths[i]), row)
+                    break
+                continue
+            chosen = slice(row, row + limit - len(items))
+            values = [_json_values(name, columns[name][chosen]) for name in fields]
+            items.extend(dict(zip(fields, values_row)) for values_row in zip(*values))
+            end = min(size, chosen.stop)
+            if len(items) >= limit and end < size:
+                next_position = (os.path.basename(self.paths[i]), end)
+                break
+        return items, next_position, total
+
+    def __len__(self):
+        self.refresh()
+        return self._snapshot["total"]
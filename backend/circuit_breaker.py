@@ -0,0 +1,113 @@
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 🧯 Consecutive CAPTCHAs/timeouts that take a site out of rotation, and for how long
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+BREAKER_BASE_DELAY = float(os.getenv("BREAKER_BASE_DELAY", "30"))
+BREAKER_MAX_DELAY = float(os.getenv("BREAKER_MAX_DELAY", "900"))
+BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+
+# Failures that mean the site is pushing back, as opposed to a bug on our side
+TRIP_OUTCOMES = ("captcha", "timeout")
+
+
+class CircuitOpenError(Exception):
+    """The site is blocking us and is skipped until its breaker lets a probe through."""
+
+    outcome = "circuit_open"
+
+    def __init__(self, site, retry_in):
+        super().__init__(f"{site} is blocking automated searches, retrying in {retry_in:.0f}s")
+        self.site = site
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Per-site health: closed (scrape), open (skip) or half-open (let a probe through).
+
+    ``threshold`` consecutive CAPTCHAs or timeouts open the circuit. It stays
+    open for an exponentially growing delay (``base_delay * 2 ** (trips - 1)``
+    capped at ``max_delay``, jittered between half and all of it so
+    instances do not retry in lockstep). Then up to ``probes`` scrapes are
+    let through: a success closes the circuit, another CAPTCHA or timeout
+    opens it again for longer.
+    """
+
+    def __init__(self, site, threshold=BREAKER_FAILURE_THRESHOLD, base_delay=BREAKER_BASE_DELAY,
+                 max_delay=BREAKER_MAX_DELAY, probes=BREAKER_HALF_OPEN_PROBES):
+        self.site = site
+        self.threshold = threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.probes = probes
+        self.state = "closed"
+        self._failures = 0   # consecutive, while closed
+        self._trips = 0      # times opened since the last success
+        self._open_until = 0.0
+        self._probing = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a scrape may run now; a ``True`` in half-open state claims a probe."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() < self._open_until:
+                    return False
+                self.state = "half_open"
+                self._probing = 0
+                logger.info(f"🔎 {self.site}: circuit half-open, probing")
+            if self._probing < self.probes:
+                self._probing += 1
+                return True
+            return False
+
+    def retry_in(self):
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic()) if self.state == "open" else 0.0
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"✅ {self.site}: circuit closed again")
+            self.state = "closed"
+            self._failures = self._trips = self._probing = 0
+
+    def record_failure(self, outcome):
+        """Count a failed scrape; only ``TRIP_OUTCOMES`` move the breaker."""
+        with self._lock:
+            if outcome not in TRIP_OUTCOMES:
+                if self.state == "half_open":
+                    self._probing = max(0, self._probing - 1)  # inconclusive, let another probe try
+                return
+            if self.state == "half_open":
+                self._open(outcome)
+            elif self.state == "closed":
+                self._failures += 1
+                if self._failures >= self.threshold:
+                    self._open(outcome)
+
+    def _open(self, outcome):
+        self._trips += 1
+        delay = min(self.max_delay, self.base_delay * 2 ** (self._trips - 1))
+        delay = random.uniform(delay / 2, delay)
+        self.state = "open"
+        self._open_until = time.monotonic() + delay
+        self._failures = self._probing = 0
+        logger.warning(f"🧯 {self.site}: circuit open for {delay:.0f}s after repeated {outcome} (trip {self._trips})")
+
+    def snapshot(self):
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "trips": self._trips,
+                "retry_in": round(retry_in, 1),
+            }
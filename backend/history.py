@@ -0,0 +1,249 @@
+import atexit
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = os.getenv("HISTORY_FILE", os.path.join(os.getcwd(), "search_history.csv"))
+HISTORY_RECENT_SIZE = int(os.getenv("HISTORY_RECENT_SIZE", "50"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "1"))
+# Past this many rows the file is compacted down to the newest half
+HISTORY_MAX_ROWS = int(os.getenv("HISTORY_MAX_ROWS", "100000"))
+
+TAIL_CHUNK = 64 * 1024
+# Bytes before a read offset that are remembered, to notice the file being rewritten under it
+TAIL_BYTES = 64
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _parse(data):
+    text = data.decode("utf-8", errors="replace")
+    return [row for row in csv.reader(io.StringIO(text)) if len(row) >= 2]
+
+
+def read_appended(path, offset=0, tail=b""):
+    """Rows appended to ``path`` after byte ``offset``, as ``(rows, offset after them, tail)``.
+
+    ``tail`` is the one the previous call returned. ``None`` when the file
+    no longer holds it just before ``offset``: it was compacted, cleared or
+    replaced since, even if it has grown past ``offset`` again.
+    """
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) < offset:
+            return None
+        f.seek(offset - len(tail))
+        if f.read(len(tail)) != tail:
+            return None
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]  # a row still being written is left for the next call
+    return _parse(data), offset + len(data), (tail + data)[-TAIL_BYTES:]
+
+
+def read_tail(path, count):
+    """The last ``count`` complete rows of ``path``, read backwards from the end in chunks."""
+    if count <= 0:
+        return []
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(TAIL_CHUNK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    if position > 0:
+        data = data[data.find(b"\n") + 1:]  # the first line is only partly read
+    data = data[:data.rfind(b"\n") + 1]     # a row still being written is skipped
+    return _parse(data)[-count:]
+
+
+class SearchHistory:
+    """Search queries appended to a CSV by a background writer.
+
+    ``record`` queues the row and adds it to the newest-first ``recent``
+    view at once. The writer appends whatever queued up in one write every
+    ``flush_interval`` seconds, adds it to the per-query counts behind
+    ``top``, and compacts the file to its newest half once it passes
+    ``max_rows``; compaction leaves the counts alone. Rows keep the ``[time, query]`` layout that
+    ``mine_recommendations`` reads by offset; it re-mines a file that shrank.
+
+    On a cold start ``recent`` is read from the end of the file and the
+    counts from ``<file>.counts.json``, which records the byte offset they
+    cover, so only rows written after it are scanned.
+    """
+
+    def __init__(self, path=HISTORY_FILE, recent_size=HISTORY_RECENT_SIZE,
+                 flush_interval=HISTORY_FLUSH_INTERVAL, max_rows=HISTORY_MAX_ROWS):
+        self.path = path
+        self.counts_path = f"{path}.counts.json"
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._recent = deque(maxlen=recent_size)
+        self._counts = Counter()
+        self._rows = 0  # rows in the file
+        self._generation = 0  # bumped by clear() so rows queued before it are dropped
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()       # in-memory views
+        self._file_lock = threading.Lock()  # the file, its row count and the counts sidecar
+        self._loaded = False
+        self._writer = None
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._file_lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.path):
+                recent = read_tail(self.path, self._recent.maxlen)
+                counts, rows = self._read_counts()
+                with self._lock:
+                    self._recent.extend(recent)
+                    self._counts = counts
+                self._rows = rows
+                logger.info(f"📜 Loaded search history: {rows} rows, {len(counts)} distinct queries")
+            self._loaded = True
+
+    def _read_counts(self):
+        """Counts from the sidecar plus the rows written after it (all rows if it is missing or the file was rewritten)."""
+        counts, rows, appended = Counter(), 0, None
+        try:
+            with open(self.counts_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            appended = read_appended(self.path, saved["offset"], bytes.fromhex(saved.get("tail", "")))
+            if appended is not None:
+                counts, rows = Counter(saved["counts"]), saved["rows"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        for row in (appended or read_appended(self.path))[0]:
+            rows += 1
+            counts[row[1]] += 1
+        return counts, rows
+
+    def _save_counts(self):
+        with self._lock:
+            counts = dict(self._counts)
+        with open(self.path, "rb") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.seek(max(0, offset - TAIL_BYTES))
+            tail = f.read()
+        tmp = f"{self.counts_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "tail": tail.hex(), "rows": self._rows, "counts": counts}, f)
+        os.replace(tmp, self.counts_path)
+
+    def _start(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.close)
+
+    def record(self, query, when=None):
+        self._load()
+        self._start()
+        row = [(when or datetime.now()).strftime(TIME_FORMAT), query]
+        with self._lock:
+            self._recent.append(row)
+            self._queue.put((self._generation, row))
+
+    def recent(self, limit=None):
+        """Newest searches first, as ``{"time", "query"}`` dicts."""
+        self._load()
+        with self._lock:
+            rows = list(self._recent)
+        rows.reverse()
+        return [{"time": row[0], "query": row[1]} for row in rows[:limit]]
+
+    def top(self, n=10):
+        """The ``n`` most searched queries, rows compacted away included, as ``{"query", "count"}`` dicts."""
+        self._load()
+        with self._lock:
+            return [{"query": query, "count": count} for query, count in self._counts.most_common(n)]
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(self.flush_interval)  # let a burst of searches share one write
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._append(batch)
+            except Exception as e:
+                logger.error(f"Failed to write search history: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, batch):
+        with self._file_lock:
+            rows = [row for generation, row in batch if generation == self._generation]
+            if not rows:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            with open(self.path, mode="a", newline="", encoding="utf-8") as f:
+                f.write(buffer.getvalue())  # one write, so readers never see half a batch
+            self._rows += len(rows)
+            with self._lock:
+                self._counts.update(row[1] for row in rows)
+            if self._rows > self.max_rows:
+                self._compact()
+
+    def _compact(self):
+        """Keep the newest ``max_rows // 2`` rows.
+
+        The counts still cover every row ever written; the sidecar is saved
+        with the new file size so a restart does not count the kept rows again.
+        """
+        keep = read_tail(self.path, self.max_rows // 2)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, mode="w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(keep)
+        os.replace(tmp, self.path)
+        logger.info(f"🗜️ Compacted search history from {self._rows} to {len(keep)} rows")
+        self._rows = len(keep)
+        self._save_counts()
+
+    def flush(self):
+        """Block until every queued search is on disk."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush, then save the counts so the next start only scans newer rows."""
+        self.flush()
+        with self._file_lock:
+            if os.path.exists(self.path):
+                self._save_counts()
+
+    def clear(self):
+        """Forget every search, including ones not written yet; returns whether there were any."""
+        self._load()
+        with self._file_lock:
+            with self._lock:
+                self._generation += 1
+                had_rows = bool(self._recent or self._counts)
+                self._recent.clear()
+                self._counts.clear()
+            self._rows = 0
+            existed = os.path.exists(self.path)
+            for path in (self.path, self.counts_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        return existed or had_rows
@@ -0,0 +1,286 @@
+import copy
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")  # "memory" or "sqlite"
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", os.path.join(os.getcwd(), "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_FINISHED = int(os.getenv("JOB_MAX_FINISHED", "1000"))
+# Seconds a worker process holds its jobs without renewing; after that another process may take them over
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+
+UNFINISHED = ("queued", "running")
+
+
+class JobStore:
+    """Storage interface for search jobs. Jobs are plain JSON-serialisable dicts.
+
+    Every unfinished job is owned by one worker process, which holds a lease
+    on it until ``lease_until``; only the owner may save the job.
+    """
+
+    def add(self, job, owner, lease_until):
+        raise NotImplementedError
+
+    def save(self, job, owner):
+        """Store ``job`` if ``owner`` still owns it; ``False`` if another process took it over."""
+        raise NotImplementedError
+
+    def get(self, job_id):
+        raise NotImplementedError
+
+    def renew(self, owner, lease_until):
+        """Extend the lease on every unfinished job ``owner`` holds."""
+        raise NotImplementedError
+
+    def claim_orphans(self, owner, lease_until, now):
+        """Take over unfinished jobs whose lease ran out and return them."""
+        raise NotImplementedError
+
+    def purge(self, finished_before, keep_max):
+        """Drop finished jobs older than ``finished_before`` and all but the newest ``keep_max``."""
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Jobs live and die with this process, so the one owner never changes
+
+    def add(self, job, owner, lease_until):
+        self.save(job, owner)
+
+    def save(self, job, owner):
+        with self._lock:
+            self._jobs[job["id"]] = copy.deepcopy(job)
+        return True
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job)
+
+    def renew(self, owner, lease_until):
+        pass
+
+    def claim_orphans(self, owner, lease_until, now):
+        return []
+
+    def purge(self, finished_before, keep_max):
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job["status"] not in UNFINISHED]
+            finished.sort(key=lambda job: job["finished_at"])
+            excess = len(finished) - keep_max
+            for i, job in enumerate(finished):
+                if i < excess or job["finished_at"] < finished_before:
+                    del self._jobs[job["id"]]
+
+
+class SQLiteJobStore(JobStore):
+    """Durable job store, so queued and running jobs survive a restart.
+
+    Several processes may share one database: each job is claimed with a
+    single conditional ``UPDATE``, so exactly one of them runs it.
+    """
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, created_at REAL NOT NULL,"
+                " finished_at REAL, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, finished_at)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:  # databases created before leases
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, job, owner, lease_until):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, finished_at, data, owner, lease_until)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job["id"], job["status"], job["created_at"], job["finished_at"], json.dumps(job),
+                 owner, lease_until),
+            )
+
+    def save(self, job, owner):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, data = ? WHERE id = ? AND owner = ?",
+                (job["status"], job["finished_at"], json.dumps(job), job["id"], owner),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def renew(self, owner, lease_until):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status IN (?, ?)",
+                (lease_until, owner, *UNFINISHED),
+            )
+
+    def claim_orphans(self, owner, lease_until, now):
+        claimed = []
+        rows = self._connect().execute(
+            "SELECT id FROM jobs WHERE status IN (?, ?) AND (lease_until IS NULL OR lease_until < ?)"
+            " ORDER BY created_at",
+            (*UNFINISHED, now),
+        ).fetchall()
+        for (job_id,) in rows:
+            # Only one process can win this: the lease is checked and taken in the same statement
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "UPDATE jobs SET owner = ?, lease_until = ? WHERE id = ? AND status IN (?, ?)"
+                    " AND (lease_until IS NULL OR lease_until < ?)",
+                    (owner, lease_until, job_id, *UNFINISHED, now),
+                )
+            if cursor.rowcount == 1:
+                claimed.append(self.get(job_id))
+        return claimed
+
+    def purge(self, finished_before, keep_max):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?",
+                (*UNFINISHED, finished_before),
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status NOT IN (?, ?)"
+                " ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (*UNFINISHED, keep_max),
+            )
+
+
+class JobQueue:
+    """Runs searches in the background and records per-site progress.
+
+    ``search`` is an ``iter_search``-style callable yielding
+    ``(name, items, error)``; ``sources`` lists every name it will yield.
+
+    The queue leases the jobs it runs and renews the leases every third of
+    ``lease`` seconds. Jobs whose lease runs out, because the process that
+    held them exited, are taken over by whichever queue claims them first.
+    """
+
+    def __init__(self, store, search, sources, workers=JOB_WORKERS,
+                 retention=JOB_RETENTION_SECONDS, max_finished=JOB_MAX_FINISHED, lease=JOB_LEASE_SECONDS):
+        self.store = store
+        self.search = search
+        self.sources = list(sources)
+        self.retention = retention
+        self.max_finished = max_finished
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._resumed = False
+        self._lock = threading.Lock()
+
+    def _resume(self):
+        """Start renewing leases and taking over orphaned jobs (first use only).
+
+        Deferred until the queue is used so that a process which never serves
+        requests, such as Flask's reloader parent, does not run them too.
+        """
+        with self._lock:
+            if self._resumed:
+                return
+            self._resumed = True
+        self._claim_orphans()
+        threading.Thread(target=self._heartbeat, name="job-lease", daemon=True).start()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.lease / 3)
+            try:
+                self.store.renew(self.owner, time.time() + self.lease)
+                self._claim_orphans()
+            except Exception as e:
+                logger.error(f"⚠️ Could not renew search job leases: {e}")
+
+    def _claim_orphans(self):
+        now = time.time()
+        for job in self.store.claim_orphans(self.owner, now + self.lease, now):
+            logger.info(f"🔁 Resuming search job {job['id']} for '{job['query']}'")
+            job.update(status="queued", results={}, errors={}, completed=[])
+            if self.store.save(job, self.owner):
+                self._executor.submit(self._run, job)
+
+    def submit(self, query):
+        self._resume()
+        self.store.purge(time.time() - self.retention, self.max_finished)
+        job = {
+            "id": uuid.uuid4().hex,
+            "query": query,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "completed": [],
+            "total": len(self.sources),
+            "results": {},
+            "errors": {},
+        }
+        self.store.add(job, self.owner, time.time() + self.lease)
+        self._executor.submit(self._run, copy.deepcopy(job))
+        return job
+
+    def get(self, job_id):
+        self._resume()
+        return self.store.get(job_id)
+
+    def _run(self, job):
+        job.update(status="running", started_at=time.time())
+        if not self.store.save(job, self.owner):
+            logger.warning(f"⚠️ Search job {job['id']} was taken over by another worker")
+            return
+        try:
+            for name, items, error in self.search(job["query"]):
+                job["results"][name] = items
+                if error:
+                    job["errors"][name] = error
+                job["completed"].append(name)
+                if not self.store.save(job, self.owner):
+                    logger.warning(f"⚠️ Search job {job['id']} was taken over by another worker")
+                    return
+            job["status"] = "done"
+        except Exception as e:
+            logger.exception(f"❌ Search job {job['id']} failed")
+            job["status"] = "failed"
+            job["errors"]["job"] = str(e)
+        job["finished_at"] = time.time()
+        self.store.save(job, self.owner)
+
+
+def create_job_store():
+    """Build the job store selected by ``JOB_BACKEND``."""
+    if JOB_BACKEND == "sqlite":
+        return SQLiteJobStore()
+    return MemoryJobStore()
@@ -0,0 +1,214 @@
+import logging
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MATCH_NUM_PERM = int(os.getenv("MATCH_NUM_PERM", "64"))
+MATCH_BANDS = int(os.getenv("MATCH_BANDS", "16"))
+MATCH_THRESHOLD = float(os.getenv("MATCH_THRESHOLD", "0.5"))
+
+SHINGLE_SIZE = 3
+BATCH_SIZE = 2000  # titles hashed per numpy pass, bounds the (perm x shingles) matrix
+MAX_BUCKET_CHECKS = 200  # newest bucket members verified per band, so generic titles stay cheap
+MAX_OFFERS = 20  # offers listed per comparison, cheapest first
+
+_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY = np.iinfo(np.uint64).max
+_WORD = re.compile(r"[a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+
+
+def _shingles(title):
+    text = " ".join(_WORD.findall(str(title or "").lower()))
+    if not text:
+        return []
+    text = f" {text} "
+    return sorted({zlib.crc32(text[i:i + SHINGLE_SIZE].encode()) for i in range(len(text) - SHINGLE_SIZE + 1)})
+
+
+def _numbers(title):
+    """Model numbers, sizes and capacities; listings that both have them must agree."""
+    return frozenset(_NUMBER.findall(str(title or "").lower()))
+
+
+def _key(item):
+    """What identifies a listing: its site and link, or its title when it has no link."""
+    link = item.get("link")
+    return item.get("site"), link if link and link != "#" else item.get("title")
+
+
+class MatchIndex:
+    """Groups listings of the same product by title similarity.
+
+    Titles are reduced to MinHash signatures over character trigrams and
+    bucketed by LSH bands, so each new listing is only compared with the few
+    listings sharing a band instead of with everything. Pairs whose
+    estimated Jaccard similarity reaches ``threshold`` are merged with
+    union-find. Listings can be added at any time; adding one that is
+    already indexed (same site and link) replaces its stored fields.
+    """
+
+    def __init__(self, num_perm=MATCH_NUM_PERM, bands=MATCH_BANDS, threshold=MATCH_THRESHOLD, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.items = []
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint64)  # grown by doubling
+        self._numbers = []
+        self._parent = []
+        self._members = []  # item id -> ids in its group while it is the group's root, else []
+        self._ids = {}  # _key(item) -> item id
+        self._buckets = {}  # (band, band signature bytes) -> [item id]
+        self._lock = threading.Lock()
+
+    def signatures(self, titles):
+        """MinHash signature of each title, one ``(len(titles), num_perm)`` array."""
+        out = np.full((len(titles), len(self._a)), _EMPTY, dtype=np.uint64)
+        for start in range(0, len(titles), BATCH_SIZE):
+            shingles = [_shingles(title) for title in titles[start:start + BATCH_SIZE]]
+            lengths = np.array([len(s) for s in shingles])
+            present = np.flatnonzero(lengths)
+            if not len(present):
+                continue
+            hashes = np.fromiter(
+                (h for s in shingles for h in s), dtype=np.uint64, count=int(lengths.sum())
+            ) % _PRIME
+            permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME
+            offsets = np.concatenate(([0], np.cumsum(lengths[present])[:-1]))
+            out[start + present] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        return out
+
+    def _find(self, i):
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _matches(self, i, candidates):
+        """The candidates similar enough to item ``i``, verified in one vectorised pass."""
+        candidates = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        agree = np.count_nonzero(self._signatures[candidates] == self._signatures[i], axis=1)
+        numbers = self._numbers[i]
+        return [
+            int(j) for j in candidates[agree >= self.threshold * len(self._a)]
+            if not (numbers and self._numbers[j] and numbers != self._numbers[j])
+        ]
+
+    def _union(self, i, j):
+        root_i, root_j = self._find(i), self._find(j)
+        if root_i == root_j:
+            return
+        if len(self._members[root_i]) > len(self._members[root_j]):
+            root_i, root_j = root_j, root_i
+        self._parent[root_i] = root_j
+        self._members[root_j].extend(self._members[root_i])
+        self._members[root_i] = []
+
+    def add(self, items):
+        """Index ``items`` (dicts with a ``title``) and return their ids.
+
+        Listings already indexed keep their id and group; only their fields are replaced.
+        """
+        items = list(items)
+        with self._lock:
+            new = [n for n, item in enumerate(items) if _key(item) not in self._ids]
+        signatures = dict(zip(new, self.signatures([items[n].get("title") for n in new])))
+        ids = []
+        with self._lock:
+            for n, item in enumerate(items):
+                known = self._ids.get(_key(item))
+                if known is not None:
+                    self.items[known] = item
+                    ids.append(known)
+                    continue
+                signature = signatures[n]
+                i = len(self.items)
+                if i == len(self._signatures):
+                    self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+                self.items.append(item)
+                self._signatures[i] = signature
+                self._numbers.append(_numbers(item.get("title")))
+                self._parent.append(i)
+                self._members.append([i])
+                self._ids[_key(item)] = i
+                ids.append(i)
+                if signature[0] == _EMPTY:
+                    continue
+
+                candidates = set()
+                for band in range(self.bands):
+                    key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                    bucket = self._buckets.setdefault(key, [])
+                    candidates.update(bucket[-MAX_BUCKET_CHECKS:])
+                    bucket.append(i)
+                for j in self._matches(i, candidates) if candidates else ():
+                    self._union(i, j)
+        return ids
+
+    def groups(self, min_size=2):
+        """Lists of matching items, largest first."""
+        with self._lock:
+            groups = [
+                [self.items[j] for j in members]
+                for members in self._members if len(members) >= min_size
+            ]
+        return sorted(groups, key=len, reverse=True)
+
+    def related(self, ids, min_size=2):
+        """The groups holding any of ``ids``, largest first."""
+        with self._lock:
+            roots = {self._find(i) for i in ids}
+            groups = [
+                [self.items[j] for j in self._members[root]]
+                for root in roots if len(self._members[root]) >= min_size
+            ]
+        return sorted(groups, key=len, reverse=True)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _price(offer):
+    return offer["price_paise"] if offer.get("valid") and offer.get("price_paise") else float("inf")
+
+
+def cheapest_offers(groups, min_sites=2):
+    """One comparison per group found on at least ``min_sites`` sites, up to ``MAX_OFFERS`` offers cheapest first."""
+    comparisons = []
+    for group in groups:
+        sites = sorted({offer["site"] for offer in group})
+        if len(sites) < min_sites:
+            continue
+        offers = sorted(group, key=_price)
+        comparisons.append({
+            "title": offers[0].get("title"),
+            "sites": sites,
+            "cheapest": offers[0],
+            "offers": offers[:MAX_OFFERS],
+        })
+    return sorted(comparisons, key=lambda comparison: _price(comparison["cheapest"]))
+
+
+def compare(results_by_site, index=None):
+    """Matching listings across ``{site: [item, ...]}`` with their cheapest offer.
+
+    The listings are added to ``index``, so with a long-lived index they are
+    matched against every listing it already holds; without one they are
+    only matched with each other.
+    """
+    index = MatchIndex() if index is None else index
+    ids = []
+    for site, items in results_by_site.items():
+        ids += index.add(dict(item, site=site) for item in items)
+    return cheapest_offers(index.related(ids))
@@ -0,0 +1,122 @@
+import bisect
+import os
+import threading
+
+from scrapers.stages import add_listener
+
+# 📈 /metrics and every measurement behind it are off unless METRICS_ENABLED=1
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; scrapes span milliseconds (HTTP tier, cache hits) to tens of seconds (browser)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """A Prometheus counter with a fixed set of label names."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """A Prometheus histogram with a fixed set of label names and buckets."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), values):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "scraper_stage_duration_seconds",
+    "Time spent in each stage of a scrape.",
+    ("site", "stage", "outcome"),
+)
+SCRAPES = Counter(
+    "scrapes_total",
+    "Site searches by how they ended (ok, captcha, timeout, parse_error, error, circuit_open).",
+    ("site", "outcome"),
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to answer each HTTP request.",
+    ("endpoint", "method", "status"),
+)
+REGISTRY = [STAGE_SECONDS, SCRAPES, REQUEST_SECONDS]
+
+
+def observe_stage(site, stage, seconds, outcome):
+    STAGE_SECONDS.observe(seconds, site, stage, outcome)
+
+
+def count_scrape(site, outcome):
+    if METRICS_ENABLED:
+        SCRAPES.inc(site, outcome)
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.expose()) + "\n"
+
+
+if METRICS_ENABLED:
+    add_listener(observe_stage)
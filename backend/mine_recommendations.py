@@ -0,0 +1,311 @@
+import csv
+import io
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+from itertools import combinations
+
+import numpy as np
+
+from catalog import SITE_FILES
+from history import HISTORY_FILE, TAIL_BYTES
+from recommender import MANIFEST, RELATED_ITEMS_DIR, _keywords
+
+logger = logging.getLogger(__name__)
+
+SESSION_GAP = float(os.getenv("MINE_SESSION_GAP", "1800"))  # seconds between searches of one session
+TOP_K = int(os.getenv("MINE_TOP_K", "10"))
+MIN_PAIR_WEIGHT = float(os.getenv("MINE_MIN_PAIR_WEIGHT", "2"))
+
+HISTORY_WEIGHT = 2.0  # searched in one session: explicit intent, counts double
+TITLE_WEIGHT = 1.0    # listed together in one product title
+MAX_SESSION_QUERIES = 20
+MAX_TITLE_TERMS = 12
+MIN_TERM_LENGTH = 3
+
+STATE = "state.json"
+
+
+class Shrunk(Exception):
+    """An input file no longer starts with what was already mined: it was cleared or rewritten."""
+
+
+def _terms(text):
+    return sorted({word for word in _keywords(str(text).lower()) if len(word) >= MIN_TERM_LENGTH})
+
+
+def _read_new_rows(path, offset, tails):
+    """CSV rows appended to ``path`` after byte ``offset``, and the offset after them.
+
+    ``tails`` maps each input to the bytes that preceded its offset (hex).
+    ``Shrunk`` is raised when they are no longer there, so a file that was
+    compacted or cleared and has since grown past ``offset`` again is not
+    read from the middle of a row.
+    """
+    tail = bytes.fromhex(tails.get(path, ""))
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < offset:
+            raise Shrunk(path)
+        f.seek(offset - len(tail))
+        if f.read(len(tail)) != tail:
+            raise Shrunk(path)
+        data = f.read()
+    complete = data.rfind(b"\n") + 1  # a row still being written is left for the next run
+    tails[path] = (tail + data[:complete])[-TAIL_BYTES:].hex()
+    text = data[:complete].decode("utf-8", errors="replace")
+    return list(csv.reader(io.StringIO(text))), offset + complete
+
+
+def _header(path):
+    with open(path, newline="", encoding="utf-8", errors="replace") as f:
+        return next(csv.reader(f), [])
+
+
+class Miner:
+    """Co-occurrence counts between search terms, updated from new input rows only.
+
+    Pair weights are kept as three parallel arrays (term a < term b) plus a
+    weight per term; ``state.json`` remembers how far each input was read.
+    """
+
+    def __init__(self, directory=RELATED_ITEMS_DIR):
+        self.directory = directory
+        self.state = {
+            "generation": 0,
+            "history": {"offset": 0, "last_time": None, "session": []},
+            "catalog": {},
+            "tails": {},  # input path -> hex of the bytes before its offset
+        }
+        self.vocab = []
+        self.pair_a = np.empty(0, dtype=np.int32)
+        self.pair_b = np.empty(0, dtype=np.int32)
+        self.pair_w = np.empty(0, dtype=np.float32)
+        self.term_w = np.empty(0, dtype=np.float32)
+        self._ids = {}
+        self._new_pairs = {}
+        self._new_terms = {}
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def load(self):
+        try:
+            with open(self._path(STATE), encoding="utf-8") as f:
+                self.state = json.load(f)
+            with open(self._path("vocab.json"), encoding="utf-8") as f:
+                self.vocab = json.load(f)
+            self.pair_a = np.load(self._path("pair_a.npy"))
+            self.pair_b = np.load(self._path("pair_b.npy"))
+            self.pair_w = np.load(self._path("pair_w.npy"))
+            self.term_w = np.load(self._path("term_w.npy"))
+        except (OSError, ValueError):
+            logger.info("🆕 No previous mining state, starting from scratch")
+            self.__init__(self.directory)
+        self._ids = {term: i for i, term in enumerate(self.vocab)}
+
+    def _id(self, term):
+        i = self._ids.get(term)
+        if i is None:
+            i = self._ids[term] = len(self.vocab)
+            self.vocab.append(term)
+        return i
+
+    def _count(self, terms, weight):
+        for term in terms:
+            i = self._id(term)
+            self._new_terms[i] = self._new_terms.get(i, 0.0) + weight
+
+    def _pair(self, a, b, weight):
+        if a == b:
+            return
+        key = (a, b) if a < b else (b, a)
+        self._new_pairs[key] = self._new_pairs.get(key, 0.0) + weight
+
+    def add_history(self, path=HISTORY_FILE):
+        """Pair the terms of one search, and of different searches made in the same session."""
+        history = self.state["history"]
+        if not os.path.exists(path):
+            if history["offset"]:
+                raise Shrunk(path)
+            return 0
+        rows, history["offset"] = _read_new_rows(path, history["offset"], self.state.setdefault("tails", {}))
+        last_time = datetime.fromisoformat(history["last_time"]) if history["last_time"] else None
+        session = history["session"]
+        for row in rows:
+            if len(row) < 2:
+                continue
+            try:
+                when = datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                continue
+            if last_time is None or (when - last_time).total_seconds() > SESSION_GAP:
+                session = []
+            last_time = when
+
+            terms = _terms(row[1])
+            self._count(terms, HISTORY_WEIGHT)
+            ids = [self._id(term) for term in terms]
+            for a, b in combinations(ids, 2):
+                self._pair(a, b, HISTORY_WEIGHT)
+            for previous in session:
+                if previous == terms:
+                    continue
+                for a in ids:
+                    for b in previous:
+                        self._pair(a, self._id(b), HISTORY_WEIGHT)
+            session = (session + [terms])[-MAX_SESSION_QUERIES:]
+
+        history["last_time"] = last_time.isoformat() if last_time else None
+        history["session"] = session
+        return len(rows)
+
+    def add_catalog(self, path):
+        """Pair terms that appear together in one product title."""
+        offsets = self.state["catalog"]
+        if not os.path.exists(path):
+            if offsets.get(path):
+                raise Shrunk(path)
+            return 0
+        header = _header(path)
+        if "title" not in header:
+            return 0
+        column = header.index("title")
+        rows, new_offset = _read_new_rows(path, offsets.get(path, 0), self.state.setdefault("tails", {}))
+        if not offsets.get(path):
+            rows = rows[1:]  # the header itself
+        offsets[path] = new_offset
+
+        for row in rows:
+            if len(row) <= column:
+                continue
+            terms = _terms(row[column])[:MAX_TITLE_TERMS]
+            self._count(terms, TITLE_WEIGHT)
+            for a, b in combinations([self._id(term) for term in terms], 2):
+                self._pair(a, b, TITLE_WEIGHT)
+        return len(rows)
+
+    def merge(self):
+        """Fold the pairs counted this run into the stored arrays."""
+        size = len(self.vocab)
+        term_w = np.zeros(size, dtype=np.float32)
+        term_w[:len(self.term_w)] = self.term_w
+        if self._new_terms:
+            ids = np.fromiter(self._new_terms, dtype=np.int64, count=len(self._new_terms))
+            term_w[ids] += np.fromiter(self._new_terms.values(), dtype=np.float32, count=len(ids))
+        self.term_w = term_w
+
+        if self._new_pairs:
+            new = np.array(list(self._new_pairs), dtype=np.int64).reshape(-1, 2)
+            keys = np.concatenate([self.pair_a.astype(np.int64) * size + self.pair_b, new[:, 0] * size + new[:, 1]])
+            weights = np.concatenate([
+                self.pair_w,
+                np.fromiter(self._new_pairs.values(), dtype=np.float32, count=len(new)),
+            ])
+            keys, inverse = np.unique(keys, return_inverse=True)
+            self.pair_w = np.bincount(inverse, weights=weights).astype(np.float32)
+            self.pair_a = (keys // size).astype(np.int32)
+            self.pair_b = (keys % size).astype(np.int32)
+        self._new_pairs, self._new_terms = {}, {}
+
+    def related_table(self, top_k=TOP_K):
+        """``(indptr, neighbors)``: each term's strongest partners by cosine-normalised weight."""
+        keep = self.pair_w >= MIN_PAIR_WEIGHT
+        a, b, w = self.pair_a[keep], self.pair_b[keep], self.pair_w[keep]
+        score = w / np.sqrt(self.term_w[a] * self.term_w[b])
+
+        source = np.concatenate([a, b])
+        target = np.concatenate([b, a])
+        score = np.concatenate([score, score])
+        order = np.lexsort((-score, source))
+        source, target = source[order], target[order]
+
+        counts = np.bincount(source, minlength=len(self.vocab))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rank = np.arange(len(source)) - starts[source]
+        source, target = source[rank < top_k], target[rank < top_k]
+
+        indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(source, minlength=len(self.vocab)))
+        return indptr, target.astype(np.int32)
+
+    def _save_array(self, name, array):
+        tmp = self._path(f".{name}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, self._path(name))
+
+    def _save_json(self, name, data):
+        tmp = self._path(f".{name}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self._path(name))
+
+    def save(self):
+        """Write the counts, then a new generation of the served table and its manifest."""
+        os.makedirs(self.directory, exist_ok=True)
+        generation = self.state["generation"]
+        try:
+            # A full rebuild starts from an empty state but must not reuse served file names
+            with open(self._path(MANIFEST), encoding="utf-8") as f:
+                generation = max(generation, json.load(f)["generation"])
+        except (OSError, ValueError, KeyError):
+            pass
+        generation += 1
+        indptr, neighbors = self.related_table()
+        files = {
+            "indptr": f"indptr.{generation}.npy",
+            "neighbors": f"neighbors.{generation}.npy",
+            "vocab": f"vocab.{generation}.json",
+        }
+        self._save_array(files["indptr"], indptr)
+        self._save_array(files["neighbors"], neighbors)
+        self._save_json(files["vocab"], self.vocab)
+        self._save_json(MANIFEST, {"generation": generation, "files": files})
+
+        self.state["generation"] = generation
+        for name, array in (("pair_a.npy", self.pair_a), ("pair_b.npy", self.pair_b),
+                            ("pair_w.npy", self.pair_w), ("term_w.npy", self.term_w)):
+            self._save_array(name, array)
+        self._save_json("vocab.json", self.vocab)
+        self._save_json(STATE, self.state)
+
+        # Servers may still map the previous generation until they notice the new one
+        for name in os.listdir(self.directory):
+            parts = name.split(".")
+            if len(parts) == 3 and parts[1].isdigit() and int(parts[1]) < generation - 1:
+                os.remove(self._path(name))
+
+
+def mine(catalog_paths, history_path=HISTORY_FILE, directory=RELATED_ITEMS_DIR, full=False):
+    """Update the related-items table with whatever was appended since the last run."""
+    miner = Miner(directory)
+    if not full:
+        miner.load()
+    try:
+        history_rows = miner.add_history(history_path)
+        catalog_rows = sum(miner.add_catalog(path) for path in catalog_paths)
+    except Shrunk as e:
+        logger.info(f"♻️ {e} was cleared or rewritten, mining everything again")
+        return mine(catalog_paths, history_path, directory, full=True)
+    if not (history_rows or catalog_rows) and miner.state["generation"]:
+        logger.info("📎 Nothing new to mine")
+        return miner
+    miner.merge()
+    miner.save()
+    logger.info(
+        f"✅ Mined {history_rows} searches and {catalog_rows} titles: "
+        f"{len(miner.vocab)} terms, {len(miner.pair_w)} pairs (generation {miner.state['generation']})"
+    )
+    return miner
+
+
+if __name__ == "__main__":
+    # python mine_recommendations.py [--full] [catalog.csv ...]  (run from the backend directory)
+    logging.basicConfig(level=logging.INFO)
+    args = sys.argv[1:]
+    full = "--full" in args
+    paths = [arg for arg in args if arg != "--full"] or list(SITE_FILES)
+    mine(paths, full=full)
@@ -0,0 +1,207 @@
+import csv
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from catalog import SITE_FILES, site_for
+from scrapers.normalize import normalize_results
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_DB_PATH = os.getenv("PRODUCT_DB_PATH", os.path.join(os.getcwd(), "products.sqlite3"))
+# ⏳ How old local matches may be to answer /search, overridable per site with
+# e.g. LOCAL_SEARCH_MAX_AGE_MEESHO=600; 0 always scrapes that site
+LOCAL_SEARCH_MAX_AGE = float(os.getenv("LOCAL_SEARCH_MAX_AGE", "3600"))
+LOCAL_SEARCH_MIN_RESULTS = int(os.getenv("LOCAL_SEARCH_MIN_RESULTS", "3"))
+LOCAL_SEARCH_LIMIT = int(os.getenv("LOCAL_SEARCH_LIMIT", "15"))
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Parsed by scrapers.normalize; added to databases created before they existed
+NUMERIC_COLUMNS = {
+    "price_paise": "INTEGER",
+    "rating_value": "REAL",
+    "review_count": "INTEGER",
+    "valid": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+def max_age(site):
+    return float(os.getenv(f"LOCAL_SEARCH_MAX_AGE_{site.upper()}", LOCAL_SEARCH_MAX_AGE))
+
+
+def fts_query(query):
+    """Every word of ``query`` as a quoted FTS5 term, so user input is never parsed as syntax."""
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(query.lower()))
+
+
+def _item(row):
+    item = {key: row[key] for key in row.keys() if row[key] is not None}
+    item.update(price_paise=row["price_paise"], rating_value=row["rating_value"],
+                review_count=row["review_count"], valid=bool(row["valid"]))
+    return item
+
+
+class ProductDB:
+    """Every scraped product in one SQLite table, with an FTS5 index over titles.
+
+    Products are unique per ``(site, link)``; seeing one again refreshes its
+    fields and ``scraped_at``.
+    """
+
+    def __init__(self, path=PRODUCT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY,
+                    site TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    price TEXT,
+                    rating TEXT,
+                    link TEXT NOT NULL,
+                    image TEXT,
+                    supplier TEXT,
+                    price_paise INTEGER,
+                    rating_value REAL,
+                    review_count INTEGER,
+                    valid INTEGER NOT NULL DEFAULT 0,
+                    scraped_at REAL NOT NULL,
+                    UNIQUE (site, link)
+                );
+                CREATE INDEX IF NOT EXISTS products_site ON products (site, scraped_at);
+                CREATE INDEX IF NOT EXISTS products_link ON products (link);
+
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts
+                    USING fts5(title, content='products', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                    INSERT INTO products_fts (rowid, title) VALUES (new.id, new.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                    INSERT INTO products_fts (products_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE OF title ON products BEGIN
+                    INSERT INTO products_fts (products_fts, rowid, title) VALUES ('delete', old.id, old.title);
+                    INSERT INTO products_fts (rowid, title) VALUES (new.id, new.title);
+                END;
+                """
+            )
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+            for column, declaration in NUMERIC_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE products ADD COLUMN {column} {declaration}")
+            conn.execute("CREATE INDEX IF NOT EXISTS products_price ON products (site, price_paise) WHERE valid")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, site, items, scraped_at=None):
+        """Insert or refresh ``items`` for ``site``; returns how many rows were written.
+
+        Items that have not been through ``normalize_results`` yet are normalised here.
+        """
+        scraped_at = time.time() if scraped_at is None else scraped_at
+        if items and "price_paise" not in items[0]:
+            items = normalize_results([dict(item) for item in items])
+        rows = [
+            (site, item.get("title") or "", item.get("price") or None, item.get("rating") or None,
+             item["link"], item.get("image") or None, item.get("supplier") or None,
+             item.get("price_paise"), item.get("rating_value"), item.get("review_count"),
+             bool(item.get("valid")), scraped_at)
+            for item in items
+            # The link is what identifies a product, so rows without one are not kept
+            if item.get("link") and item.get("link") != "#"
+        ]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO products (site, title, price, rating, link, image, supplier,"
+                " price_paise, rating_value, review_count, valid, scraped_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (site, link) DO UPDATE SET"
+                " title = excluded.title, price = excluded.price, rating = excluded.rating,"
+                " image = excluded.image, supplier = excluded.supplier,"
+                " price_paise = excluded.price_paise, rating_value = excluded.rating_value,"
+                " review_count = excluded.review_count, valid = excluded.valid,"
+                " scraped_at = excluded.scraped_at"
+                " WHERE excluded.scraped_at >= products.scraped_at",
+                rows,
+            )
+        return len(rows)
+
+    def search(self, query, site=None, max_age=None, limit=LOCAL_SEARCH_LIMIT):
+        """Best title matches for ``query``, newest data only when ``max_age`` is given."""
+        terms = fts_query(query)
+        if not terms:
+            return []
+        sql = (
+            "SELECT p.site, p.title, p.price, p.rating, p.link, p.image, p.supplier,"
+            " p.price_paise, p.rating_value, p.review_count, p.valid"
+            " FROM products_fts JOIN products p ON p.id = products_fts.rowid"
+            " WHERE products_fts MATCH ?"
+        )
+        params = [terms]
+        if site:
+            sql += " AND p.site = ?"
+            params.append(site)
+        if max_age is not None:
+            sql += " AND p.scraped_at >= ?"
+            params.append(time.time() - max_age)
+        sql += " ORDER BY bm25(products_fts) LIMIT ?"
+        params.append(limit)
+        rows = self._connect().execute(sql, params).fetchall()
+        return [_item(row) for row in rows]
+
+    def iter_items(self, batch_size=1000):
+        """Every stored product, oldest first, in lists of up to ``batch_size``."""
+        cursor = self._connect().execute(
+            "SELECT site, title, price, rating, link, image, supplier,"
+            " price_paise, rating_value, review_count, valid FROM products ORDER BY id"
+        )
+        while rows := cursor.fetchmany(batch_size):
+            yield [_item(row) for row in rows]
+
+    def fresh_results(self, site, query):
+        """Local matches young enough to answer a search for ``site``, or ``None``."""
+        age = max_age(site)
+        if age <= 0:
+            return None
+        items = self.search(query, site=site, max_age=age)
+        return items if len(items) >= LOCAL_SEARCH_MIN_RESULTS else None
+
+    def import_csv(self, path, site=None):
+        """Load a scraper CSV, stamped with the file's mtime as its scrape time."""
+        site = site or site_for(path)
+        scraped_at = os.path.getmtime(path)
+        count = 0
+        with open(path, mode="r", newline="", encoding="utf-8") as f:
+            batch = []
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= 1000:
+                    count += self.upsert(site, batch, scraped_at)
+                    batch = []
+            count += self.upsert(site, batch, scraped_at)
+        logger.info(f"📥 Imported {count} {site} products from {path}")
+        return count
+
+
+if __name__ == "__main__":
+    # python product_db.py [file.csv ...]  (defaults to the scraper CSVs in this directory)
+    logging.basicConfig(level=logging.INFO)
+    db = ProductDB()
+    for csv_path in sys.argv[1:] or [name for name in SITE_FILES if os.path.exists(name)]:
+        db.import_csv(csv_path)
@@ -1,5 +1,15 @@
-from textblob import TextBlob
 import difflib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 # Predefined related accessories
 accessory_map = {
@@ -21,10 +31,153 @@ accessory_map = {
     "oil": ["Olive Oil", "Mustard Oil", "Sunflower Oil"]
 }
 
+# 🏷️ Words skipped when matching query words to accessory keys (the old POS tagger's job)
+STOPWORDS = {
+    "a", "an", "and", "the", "for", "with", "of", "in", "on", "to", "by", "from",
+    "best", "buy", "cheap", "cheapest", "new", "latest", "top", "under", "below", "price",
+    "online", "offer", "offers", "deal", "deals", "sale", "good", "low", "high", "rs",
+}
+
+RECOMMENDER_CACHE_SIZE = int(os.getenv("RECOMMENDER_CACHE_SIZE", "1024"))
+
+# 📈 Related terms mined by mine_recommendations.py from search history and the catalog
+RELATED_ITEMS_DIR = os.getenv("RELATED_ITEMS_DIR", os.path.join(os.getcwd(), "related_items"))
+RELATED_CHECK_INTERVAL = float(os.getenv("RELATED_ITEMS_CHECK_INTERVAL", "60"))
+RELATED_PER_WORD = 3
+MANIFEST = "related.json"
+
+_TOKEN = re.compile(r"[a-z]+")
+
+
+_ALPHABET = {c: i for i, c in enumerate("abcdefghijklmnopqrstuvwxyz0123456789 ")}
+_OTHER = len(_ALPHABET)  # every other character shares one column
+
+
+def _char_counts(text):
+    counts = np.zeros(_OTHER + 1, dtype=np.int32)
+    for char in text:
+        counts[_ALPHABET.get(char, _OTHER)] += 1
+    return counts
+
+
+class FuzzyIndex:
+    """``difflib.get_close_matches(word, keys, n=1)`` without scoring every key.
+
+    Keys are kept as a character-count matrix, so one numpy pass gives each
+    key's ``quick_ratio`` upper bound against the word. Keys are then scored
+    with difflib from the highest bound down, stopping as soon as no
+    remaining key can beat the best score.
+    """
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._counts = np.array([_char_counts(key) for key in self.keys], dtype=np.int32).reshape(len(self.keys), -1)
+        self._lengths = self._counts.sum(axis=1)
+
+    def best_match(self, word, cutoff):
+        if not self.keys:
+            return None
+        shared = np.minimum(self._counts, _char_counts(word)).sum(axis=1)
+        bounds = 2.0 * shared / np.maximum(self._lengths + len(word), 1)
+        candidates = np.flatnonzero(bounds >= cutoff)
+        order = candidates[np.argsort(-bounds[candidates], kind="stable")]
+
+        best, best_score = None, cutoff
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        for i in order:
+            if bounds[i] < best_score:
+                break
+            key = self.keys[i]
+            matcher.set_seq1(key)
+            score = matcher.ratio()
+            # Ties go to the larger key, as in get_close_matches
+            if score > best_score or (score == best_score and (best is None or key > best)):
+                best, best_score = key, score
+        return best
+
+
+# Built once at import; call build_index() after changing accessory_map
+INDEX = FuzzyIndex(accessory_map)
+
+
+def build_index():
+    global INDEX
+    INDEX = FuzzyIndex(accessory_map)
+    _recommend.cache_clear()
+
+
+def _keywords(query):
+    return [word for word in _TOKEN.findall(query) if word not in STOPWORDS]
+
+
+class RelatedItems:
+    """Memory-mapped term -> related terms table written by mine_recommendations.py.
+
+    Neighbours of term ``i`` are ``neighbors[indptr[i]:indptr[i + 1]]``,
+    strongest first, so a lookup is a dict hit plus an array slice.
+    """
+
+    def __init__(self, directory=RELATED_ITEMS_DIR):
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+        files = {name: os.path.join(directory, file) for name, file in manifest["files"].items()}
+        with open(files["vocab"], encoding="utf-8") as f:
+            self.terms = json.load(f)
+        self.ids = {term: i for i, term in enumerate(self.terms)}
+        self.indptr = np.load(files["indptr"], mmap_mode="r")
+        self.neighbors = np.load(files["neighbors"], mmap_mode="r")
+        self.generation = manifest["generation"]
+
+    def related(self, term, n=RELATED_PER_WORD):
+        i = self.ids.get(term)
+        if i is None:
+            return []
+        start, end = int(self.indptr[i]), int(self.indptr[i + 1])
+        return [self.terms[j] for j in self.neighbors[start:min(end, start + n)]]
+
+
+_related = None
+_related_checked = 0.0
+_related_mtime = None
+_related_lock = threading.Lock()
+
+
+def _refresh_related():
+    """Load the mined table, again whenever the job has written a new one."""
+    global _related, _related_checked, _related_mtime
+    now = time.monotonic()
+    if now - _related_checked < RELATED_CHECK_INTERVAL:
+        return
+    with _related_lock:
+        if now - _related_checked < RELATED_CHECK_INTERVAL:
+            return
+        _related_checked = now
+        try:
+            mtime = os.path.getmtime(os.path.join(RELATED_ITEMS_DIR, MANIFEST))
+        except OSError:
+            return
+        if mtime == _related_mtime:
+            return
+        try:
+            _related = RelatedItems()
+            _related_mtime = mtime
+            _recommend.cache_clear()
+            logger.info(f"📈 Loaded {len(_related.terms)} mined related terms")
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load mined related items: {e}")
+
+
 def get_recommendations(query):
-    query = query.lower()
-    blob = TextBlob(query)
-    nouns = [word.lower() for word, tag in blob.tags if tag.startswith("NN") ]
+    """Accessories for ``query``, memoised per normalised query (copies are returned)."""
+    _refresh_related()
+    normalized = " ".join(query.lower().split())
+    return [dict(item) for item in _recommend(normalized)]
+
+
+@lru_cache(maxsize=RECOMMENDER_CACHE_SIZE)
+def _recommend(query):
+    nouns = _keywords(query)
 
     recommendations = []
     seen_names = set()
@@ -40,9 +193,9 @@ def get_recommendations(query):
         return None
 
     # Full match on whole query
-    full_match = difflib.get_close_matches(query, accessory_map.keys(), n=1, cutoff=0.7)
+    full_match = INDEX.best_match(query, cutoff=0.7)
     if full_match:
-        for item in accessory_map[full_match[0]]:
+        for item in accessory_map[full_match]:
             data = create_item(item)
             if data:
                 recommendations.append(data)
@@ -50,13 +203,21 @@ def get_recommendations(query):
     # Partial match on nouns in query
     if not recommendations:
         for noun in nouns:
-            match = difflib.get_close_matches(noun, accessory_map.keys(), n=1, cutoff=0.6)
+            match = INDEX.best_match(noun, cutoff=0.6)
             if match:
-                for item in accessory_map[match[0]]:
+                for item in accessory_map[match]:
                     data = create_item(item)
                     if data:
                         recommendations.append(data)
 
+    # Items mined from what people search for and what the catalog lists together
+    if not recommendations and _related is not None:
+        for noun in nouns:
+            for term in _related.related(noun):
+                data = create_item(f"{noun} {term}")
+                if data:
+                    recommendations.append(data)
+
     # Smart fallback if no matches found
     if not recommendations:
         keywords = query.split()[:3]
@@ -71,7 +232,7 @@ def get_recommendations(query):
                 if data:
                     recommendations.append(data)
 
-    return recommendations or [{
+    return tuple(recommendations or [{
         "name": "Popular Items",
         "image": "https://via.placeholder.com/100?text=Explore+More"
-    }]
\ No newline at end of file
+    }])
\ No newline at end of file
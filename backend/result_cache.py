@@ -0,0 +1,247 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.getenv("SEARCH_CACHE_BACKEND", "memory")  # "memory" or "sqlite"
+CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", os.path.join(os.getcwd(), "search_cache.sqlite3"))
+CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "900"))
+CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "500"))
+CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(20 * 1024 * 1024)))
+
+
+class CacheBackend:
+    """Storage interface for ``ResultCache``.
+
+    Values are JSON-serialisable. ``get`` returns ``(value, stored_at)`` or
+    ``None`` and counts as a use for LRU purposes.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, stored_at):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU bounded by entry count and serialised size."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, value, stored_at):
+        size = len(json.dumps(value))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[2]
+            self._entries[key] = (value, stored_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+
+    def delete(self, key):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend(CacheBackend):
+    """LRU cache in a local SQLite file, shared by every worker on the host."""
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL,"
+                " used_at REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, stored_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE cache SET used_at = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, stored_at):
+        payload = json.dumps(value)
+        if len(payload) > self.max_bytes:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, stored_at, used_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, stored_at, time.time(), len(payload)),
+            )
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                self._evict(conn, count, total)
+
+    def _evict(self, conn, count, total):
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY used_at").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ResultCache:
+    """TTL cache with stale-while-revalidate on top of a ``CacheBackend``.
+
+    Entries younger than ``ttl`` are fresh. Entries up to ``ttl + stale_ttl``
+    old are served immediately while a background refresh replaces them.
+    Anything older is a miss. Empty results are not stored.
+    """
+
+    def __init__(self, backend, ttl=CACHE_TTL, stale_ttl=CACHE_STALE_TTL, refresh_workers=2):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh")
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key, allow_stale=True):
+        """Return the cached value for ``key`` without loading, or ``None``."""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        age = time.time() - stored_at
+        limit = self.ttl + (self.stale_ttl if allow_stale else 0)
+        return value if age < limit else None
+
+    def peek(self, key):
+        """Whatever is stored for ``key`` however old it is, or ``None``."""
+        entry = self.backend.get(key)
+        return entry[0] if entry is not None else None
+
+    def get_or_load(self, key, loader):
+        entry = self.backend.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                self._count("hits")
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale_hits")
+                self._schedule_refresh(key, loader)
+                return value
+
+        self._count("misses")
+        value = loader()
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        if value:
+            self.backend.set(key, value, time.time())
+
+    def _schedule_refresh(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._refresher.submit(self._refresh, key, loader)
+
+    def _refresh(self, key, loader):
+        try:
+            self.put(key, loader())
+            self._count("refreshes")
+            logger.info(f"♻️ Refreshed cache entry {key}")
+        except Exception as e:
+            self._count("refresh_errors")
+            logger.warning(f"⚠️ Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["entries"] = len(self.backend)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+def create_cache():
+    """Build the search cache selected by ``SEARCH_CACHE_BACKEND``."""
+    if CACHE_BACKEND == "sqlite":
+        backend = SQLiteBackend()
+    else:
+        backend = MemoryBackend()
+    return ResultCache(backend)
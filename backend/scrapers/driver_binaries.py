@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 🗂️ Shared by every worker process on the machine
+MANIFEST_FILE = os.getenv(
+    "CHROMEDRIVER_MANIFEST",
+    os.path.join(os.path.expanduser("~"), ".cache", "price-comparison", "chromedriver.json"),
+)
+
+CHROME_CANDIDATES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+WINDOWS_REGISTRY_KEYS = [
+    r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+    r"HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon",
+    r"HKEY_LOCAL_MACHINE\Software\Wow6432Node\Google\Chrome\BLBeacon",
+]
+
+VERSION_PATTERN = re.compile(r"(\d+\.\d+\.\d+(?:\.\d+)?)")
+
+_lock = threading.Lock()
+_resolved = None
+
+
+class ChromeNotFoundError(RuntimeError):
+    pass
+
+
+def _run(command):
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return ""
+    return completed.stdout
+
+
+def detect_chrome_version():
+    """Return the installed Chrome/Chromium version, or ``None`` if there is none."""
+    if sys.platform.startswith("win"):
+        for key in WINDOWS_REGISTRY_KEYS:
+            match = VERSION_PATTERN.search(_run(["reg", "query", key, "/v", "version"]))
+            if match:
+                return match.group(1)
+        return None
+
+    binaries = [os.getenv("CHROME_BINARY")] + CHROME_CANDIDATES
+    for binary in filter(None, binaries):
+        path = shutil.which(binary) or (binary if os.path.isfile(binary) else None)
+        if not path:
+            continue
+        match = VERSION_PATTERN.search(_run([path, "--version"]))
+        if match:
+            return match.group(1)
+    return None
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest):
+    os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+    tmp_path = f"{MANIFEST_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_FILE)
+
+
+def resolve_chromedriver(force=False):
+    """Return ``{"chrome_version", "chromedriver", "resolved_at"}`` for this machine.
+
+    The result is cached in-process and in ``MANIFEST_FILE``. ChromeDriver is
+    only downloaded or probed again when the local Chrome version changes.
+    Raises ``ChromeNotFoundError`` when no Chrome installation is found.
+    """
+    global _resolved
+    with _lock:
+        if _resolved and not force:
+            return _resolved
+
+        chrome_version = detect_chrome_version()
+        if not chrome_version:
+            raise ChromeNotFoundError(
+                "Chrome/Chromium is not installed or not on PATH. "
+                "Install Google Chrome or set CHROME_BINARY to its executable."
+            )
+
+        manifest = _load_manifest()
+        if (
+            not force
+            and manifest.get("chrome_version") == chrome_version
+            and os.path.isfile(manifest.get("chromedriver", ""))
+        ):
+            logger.info(f"📦 Using cached ChromeDriver for Chrome {chrome_version}")
+            _resolved = manifest
+            return _resolved
+
+        logger.info(f"🔧 Resolving ChromeDriver for Chrome {chrome_version}...")
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+        except Exception as e:
+            raise RuntimeError(f"Could not install ChromeDriver for Chrome {chrome_version}: {e}") from e
+
+        _resolved = {
+            "chrome_version": chrome_version,
+            "chromedriver": driver_path,
+            "resolved_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        try:
+            _save_manifest(_resolved)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write {MANIFEST_FILE}: {e}")
+        logger.info(f"✅ ChromeDriver ready at {driver_path}")
+        return _resolved
@@ -0,0 +1,278 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from scrapers.driver_binaries import resolve_chromedriver
+from scrapers.stages import stage
+
+try:
+    import psutil
+except ImportError:  # RSS recycling is skipped without psutil
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
+)
+
+POOL_MIN_SIZE = int(os.getenv("DRIVER_POOL_MIN", "1"))
+POOL_MAX_SIZE = int(os.getenv("DRIVER_POOL_MAX", "2"))
+DRIVER_MAX_USES = int(os.getenv("DRIVER_MAX_USES", "25"))
+DRIVER_MAX_RSS_MB = int(os.getenv("DRIVER_MAX_RSS_MB", "1024"))
+LEASE_TIMEOUT = float(os.getenv("DRIVER_LEASE_TIMEOUT", "30"))
+
+
+@dataclass(frozen=True)
+class DriverProfile:
+    """Everything that makes two Chrome sessions interchangeable.
+
+    Scrapers whose profiles compare equal share the same warm drivers.
+    """
+    engine: str = "selenium"  # "selenium" or "uc" (undetected_chromedriver)
+    user_agent: str = DEFAULT_USER_AGENT
+    proxy: Optional[str] = None
+    arguments: Tuple[str, ...] = ()
+    page_load_strategy: Optional[str] = None
+    blocked_urls: Tuple[str, ...] = ()  # CDP Network.setBlockedURLs patterns
+    prefs: Tuple[Tuple[str, object], ...] = ()  # Chrome profile preferences
+    on_create: Optional[Callable] = None  # called once with each new driver
+
+
+def _build_options(profile):
+    if profile.engine == "uc":
+        import undetected_chromedriver as uc
+        options = uc.ChromeOptions()
+    else:
+        options = Options()
+    for argument in profile.arguments:
+        options.add_argument(argument)
+    options.add_argument(f"user-agent={profile.user_agent}")
+    if profile.proxy:
+        options.add_argument(f"--proxy-server={profile.proxy}")
+    if profile.page_load_strategy:
+        options.page_load_strategy = profile.page_load_strategy
+    if profile.prefs:
+        options.add_experimental_option("prefs", dict(profile.prefs))
+    return options
+
+
+def _launch_uc(options, driver_path):
+    import undetected_chromedriver as uc
+    try:
+        return uc.Chrome(options=options, driver_executable_path=driver_path)
+    except FileExistsError:
+        logger.warning("⚠️ Chrome already patched. Retrying with patch skipped...")
+        uc_exe = os.path.expanduser("~\\appdata\\roaming\\undetected_chromedriver\\undetected_chromedriver.exe")
+        if os.path.exists(uc_exe):
+            return uc.Chrome(options=options, driver_executable_path=uc_exe)
+        raise FileNotFoundError("Undetected ChromeDriver binary not found.")
+
+
+def launch_driver(profile):
+    """Start a brand new Chrome session for ``profile``."""
+    with stage("driver_start"):
+        options = _build_options(profile)
+        driver_path = resolve_chromedriver()["chromedriver"]
+        if profile.engine == "uc":
+            driver = _launch_uc(options, driver_path)
+        else:
+            driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        if profile.blocked_urls:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(profile.blocked_urls)})
+        if profile.on_create:
+            profile.on_create(driver)
+    return driver
+
+
+def _driver_rss_mb(driver):
+    """Resident memory of chromedriver plus every Chrome process it spawned."""
+    if psutil is None:
+        return 0.0
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.debug(f"Driver quit failed: {e}")
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class DriverPool:
+    """Keeps warm Chrome sessions per ``DriverProfile`` and leases them out.
+
+    Drivers are health-checked before each lease, reset (cookies, extra
+    tabs) when returned, and retired after ``max_uses`` leases or once they
+    grow past ``max_rss_mb``. At most ``max_size`` drivers exist per profile;
+    ``min_size`` of them are kept launched ahead of demand.
+    """
+
+    def __init__(self, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 max_uses=DRIVER_MAX_USES, max_rss_mb=DRIVER_MAX_RSS_MB,
+                 lease_timeout=LEASE_TIMEOUT):
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.lease_timeout = lease_timeout
+        self._cond = threading.Condition()
+        self._idle = {}   # profile -> [_PooledDriver]
+        self._count = {}  # profile -> drivers alive (idle + leased + launching)
+        self._closed = False
+
+    def warm(self, profile):
+        """Launch drivers in the background until ``min_size`` exist."""
+        with self._cond:
+            missing = self.min_size - self._count.get(profile, 0)
+            self._count[profile] = self._count.get(profile, 0) + max(missing, 0)
+        for _ in range(max(missing, 0)):
+            threading.Thread(target=self._warm_one, args=(profile,), daemon=True).start()
+
+    def _warm_one(self, profile):
+        try:
+            entry = _PooledDriver(launch_driver(profile))
+        except Exception as e:
+            logger.error(f"❌ Failed to pre-launch driver: {e}")
+            self._discard(profile)
+            return
+        with self._cond:
+            self._idle.setdefault(profile, []).append(entry)
+            self._cond.notify_all()
+        logger.info("🔥 Warm driver ready")
+
+    def acquire(self, profile, timeout=None):
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Driver pool is shut down")
+                idle = self._idle.get(profile)
+                if idle:
+                    entry = idle.pop()
+                elif self._count.get(profile, 0) < self.max_size:
+                    self._count[profile] = self._count.get(profile, 0) + 1
+                    entry = None
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No driver available within {timeout:g}s")
+                    self._cond.wait(remaining)
+                    continue
+
+            if entry is None:
+                try:
+                    return _PooledDriver(launch_driver(profile))
+                except Exception:
+                    self._discard(profile)
+                    raise
+            if self._is_healthy(entry.driver):
+                return entry
+            logger.warning("⚠️ Dropping unresponsive driver from pool")
+            _quit(entry.driver)
+            self._discard(profile)
+
+    def release(self, profile, entry, broken=False):
+        entry.uses += 1
+        retire = broken or entry.uses >= self.max_uses
+        if not retire and self.max_rss_mb:
+            rss = _driver_rss_mb(entry.driver)
+            if rss > self.max_rss_mb:
+                logger.info(f"♻️ Recycling driver using {rss:.0f} MB")
+                retire = True
+        if not retire and not self._reset(entry.driver):
+            retire = True
+
+        if retire:
+            _quit(entry.driver)
+            self._discard(profile)
+            if not self._closed:
+                self.warm(profile)
+            return
+
+        with self._cond:
+            if self._closed:
+                _quit(entry.driver)
+                return
+            self._idle.setdefault(profile, []).append(entry)
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, profile, timeout=None):
+        with stage("driver_acquire"):
+            entry = self.acquire(profile, timeout)
+        try:
+            yield entry.driver
+        finally:
+            self.release(profile, entry)
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle = [entry for entries in self._idle.values() for entry in entries]
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            _quit(entry.driver)
+
+    def _discard(self, profile):
+        with self._cond:
+            self._count[profile] = max(0, self._count.get(profile, 0) - 1)
+            self._cond.notify_all()
+
+    @staticmethod
+    def _is_healthy(driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(driver):
+        """Return a driver to a blank single-tab state with no cookies."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Driver reset failed: {e}")
+            return False
+
+
+POOL = DriverPool()
+atexit.register(POOL.shutdown)
+
+
+def lease_driver(profile, timeout=None):
+    """Lease a warm driver for ``profile`` from the shared pool."""
+    return POOL.lease(profile, timeout)
@@ -0,0 +1,6 @@
+class CaptchaError(Exception):
+    """The site answered with a CAPTCHA or a bot check instead of results."""
+
+    def __init__(self, site, message=None):
+        super().__init__(message or f"CAPTCHA encountered on {site}")
+        self.site = site
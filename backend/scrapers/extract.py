@@ -0,0 +1,108 @@
+import logging
+import os
+import re
+from urllib.parse import urljoin
+
+try:
+    import lxml.html
+except ImportError:  # the "html" mode needs lxml; "script" mode does not
+    lxml = None
+
+from scrapers.stages import stage
+
+logger = logging.getLogger(__name__)
+
+# "script": one execute_script round trip evaluates every field in the browser.
+# "html": one page_source grab parsed in-process with lxml.
+EXTRACT_MODE = os.getenv("SCRAPER_EXTRACT_MODE", "script")
+
+# Attributes that are resolved to absolute URLs, like WebElement.get_attribute does
+URL_ATTRIBUTES = ("href", "src")
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Arguments: card XPaths (first one with matches wins), {field: XPath relative to card}
+_EXTRACT_JS = r"""
+const [cardXPaths, fields, urlAttributes] = arguments;
+const ORDERED = XPathResult.ORDERED_NODE_SNAPSHOT_TYPE;
+const FIRST = XPathResult.FIRST_ORDERED_NODE_TYPE;
+
+function valueOf(node) {
+  if (!node) return "";
+  if (node.nodeType === Node.ATTRIBUTE_NODE) {
+    const value = (node.value || "").trim();
+    if (value && urlAttributes.includes(node.name)) {
+      try { return new URL(value, document.baseURI).href; } catch (e) { return value; }
+    }
+    return value;
+  }
+  return (node.textContent || "").replace(/\s+/g, " ").trim();
+}
+
+let cards = [];
+for (const xpath of cardXPaths) {
+  const snapshot = document.evaluate(xpath, document, null, ORDERED, null);
+  if (snapshot.snapshotLength) {
+    for (let i = 0; i < snapshot.snapshotLength; i++) cards.push(snapshot.snapshotItem(i));
+    break;
+  }
+}
+
+return cards.map(card => {
+  const row = {};
+  for (const [name, xpath] of Object.entries(fields)) {
+    row[name] = valueOf(document.evaluate(xpath, card, null, FIRST, null).singleNodeValue);
+  }
+  return row;
+});
+"""
+
+
+def has_class(name):
+    """XPath predicate equivalent to the CSS class selector ``.name``."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _node_value(node, base_url):
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        value = str(node).strip()
+        if value and getattr(node, "is_attribute", False) and node.attrname in URL_ATTRIBUTES:
+            return urljoin(base_url, value)
+        return value
+    return _WHITESPACE.sub(" ", node.text_content()).strip()
+
+
+def parse_cards(html, card_xpaths, fields, base_url=""):
+    """Evaluate the card and field XPaths against ``html`` with lxml."""
+    if lxml is None:
+        raise RuntimeError("lxml is required to parse pages in-process")
+    tree = lxml.html.fromstring(html, base_url=base_url or None)
+    cards = []
+    for xpath in card_xpaths:
+        cards = tree.xpath(xpath)
+        if cards:
+            break
+
+    rows = []
+    for card in cards:
+        row = {}
+        for name, xpath in fields.items():
+            matches = card.xpath(xpath)
+            row[name] = _node_value(matches[0] if matches else None, base_url)
+        rows.append(row)
+    return rows
+
+
+def extract_cards(driver, card_xpaths, fields):
+    """Read every product card on the current page in a single round trip.
+
+    Returns one dict per card mapping each field name to the string value of
+    its XPath: attribute values as-is (``href``/``src`` made absolute),
+    elements as whitespace-collapsed text, ``""`` when nothing matches.
+    """
+    with stage("parse"):
+        if EXTRACT_MODE == "html" and lxml is not None:
+            return parse_cards(driver.page_source, card_xpaths, fields, driver.current_url)
+        return driver.execute_script(_EXTRACT_JS, list(card_xpaths), fields, list(URL_ATTRIBUTES)) or []
@@ -1,45 +1,106 @@
-import time
-import random
 import logging
 import os
-import csv
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from scrapers.product_store import ProductStore
+from scrapers.normalize import normalize_results
+from scrapers.driver_pool import DriverProfile, lease_driver
+from scrapers.resource_blocking import blocking_options, record_page_weight
+from scrapers.extract import extract_cards
+from scrapers.scrolling import scroll_until_settled
+from scrapers.stages import stage, track
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 🧪 Point at a local stand-in with e.g. FLIPKART_BASE_URL=http://127.0.0.1:8765/flipkart
+BASE_URL = os.getenv("FLIPKART_BASE_URL", "https://www.flipkart.com").rstrip("/")
+
+def _profile(headless):
+    arguments = ("--headless=new", "--disable-gpu") if headless else ()
+    return DriverProfile(
+        engine="selenium",
+        arguments=arguments + (
+            "--no-sandbox",
+            "--disable-dev-shm-usage",
+            "--start-maximized",
+            "--disable-infobars",
+            "--disable-extensions",
+            "--disable-blink-features=AutomationControlled",
+        ),
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36",
+        proxy=os.getenv("PROXY_SERVER"),
+        **blocking_options("flipkart"),
+    )
+
+PROFILE = _profile(headless=True)
+
+# ✅ Results are appended without duplicates (keyed on the product link)
+STORE = ProductStore(
+    os.path.join(os.getcwd(), "data", "flipkart_results.csv"),
+    ["title", "price", "rating", "link", "image"],
+    key_fields=("link",),
+)
+
 def scrape_flipkart(query, max_results=14, headless=True):
-    options = Options()
-    if headless:
-        options.add_argument("--headless=new")
-        options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--start-maximized")
-    options.add_argument("--disable-infobars")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36")
-
-    proxy = os.getenv("PROXY_SERVER")
-    if proxy:
-        options.add_argument(f"--proxy-server={proxy}")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    results = []
+    with track("flipkart"):
+        with lease_driver(_profile(headless)) as driver:
+            results = _scrape_page(driver, query, max_results)
+
+        normalize_results(results)
+        try:
+            STORE.append(results)
+        except Exception as e:
+            logger.error(f"\u274c Failed to append results to CSV: {e}")
 
+        return results
+
+# Product links, tried in order until one of the selectors matches
+CARD_XPATHS = [
+    "//a[starts-with(@class, 'WKTcLC')][@href][@rel='noopener noreferrer']",
+    "//a[@class='wjcEIp'][@href][@rel='noopener noreferrer']",
+    "//a[@href][@rel='noopener noreferrer']",
+]
+
+CARD_FIELDS = {
+    "href": "@href",
+    "title": "@title",
+    "text": ".",
+    "img_alt": ".//img/@alt",
+    "img_src": ".//img/@src",
+    "img_data_src": ".//img/@data-src",
+    "price": "ancestor::div[@data-id]//div[starts-with(@class, 'Nx9bqj')]",
+    "rating": "ancestor::div[@data-id]//div[contains(@class, 'XQDdHH')]",
+    "card_image": "ancestor::div[@data-id]//img/@src",
+}
+
+BAD_WORDS = ["Add to Compare", "Save", "Wishlist"]
+
+def _to_result(card):
+    title = card["title"] or card["text"]
+    image = ""
+
+    if any(bad in title for bad in BAD_WORDS) or not title.strip():
+        title = card["img_alt"] or "No Title"
+        image = card["img_src"] or card["img_data_src"]
+
+    return {
+        "title": title.strip(),
+        "price": card["price"] or "N/A",
+        "rating": card["rating"] or "No Rating",
+        "link": card["href"],
+        "image": image or card["card_image"],
+    }
+
+def _scrape_page(driver, query, max_results):
+    results = []
     try:
-        search_url = f"https://www.flipkart.com/search?q={query.replace(' ', '+')}"
+        search_url = f"{BASE_URL}/search?q={query.replace(' ', '+')}"
         logger.info(f"\u2728 Searching Flipkart: {search_url}")
-        driver.get(search_url)
+        with stage("page_load"):
+            driver.get(search_url)
 
         # Close login popup if appears
         try:
@@ -55,108 +116,26 @@ def scrape_flipkart(query, max_results=14, headless=True):
             EC.presence_of_element_located((By.CSS_SELECTOR, "a[href][rel='noopener noreferrer']"))
         )
 
-        body = driver.find_element(By.TAG_NAME, "body")
-        for _ in range(5):
-            body.send_keys(Keys.PAGE_DOWN)
-            time.sleep(random.uniform(1.2, 2.0))
-
-        product_links = driver.find_elements(By.CSS_SELECTOR, "a[class^='WKTcLC'][href][rel='noopener noreferrer']")
-
-        if not product_links:
-            logger.info("No product links found with the first condition. Using the second condition.")
-            product_links = driver.find_elements(By.CSS_SELECTOR, "a[class='wjcEIp'][href][rel='noopener noreferrer']")
-
-        if not product_links:
-            logger.info("No product links found with the second condition. Using the third condition.")
-            product_links = driver.find_elements(By.CSS_SELECTOR, "a[href][rel='noopener noreferrer']")
-
-        bad_words = ["Add to Compare", "Save", "Wishlist"]
-
-        for link in product_links:
-            try:
-                href = link.get_attribute("href")
-                if not href or "/p/" not in href:
-                    continue
-
-                product = {"title": "No Title", "price": "N/A", "rating": "No Rating", "link": href, "image": ""}
-
-                title = link.get_attribute("title") or link.text.strip()
-
-                if any(bad in title for bad in bad_words) or not title.strip():
-                    try:
-                        img_elem = link.find_element(By.TAG_NAME, "img")
-                        title = img_elem.get_attribute("alt") or "No Title"
-                        product["image"] = img_elem.get_attribute("src") or img_elem.get_attribute("data-src") or ""
-                    except Exception:
-                        title = "No Title"
+        scroll_until_settled(driver, "Flipkart", CARD_XPATHS, target=max_results, legacy_wait=8.0)
+        record_page_weight(driver, "flipkart")
 
-                product["title"] = title.strip()
+        cards = extract_cards(driver, CARD_XPATHS, CARD_FIELDS)
+        logger.info(f"🔍 Found {len(cards)} product links")
 
-                try:
-                    price_elem = link.find_element(By.XPATH, "./ancestor::div[@data-id]//div[starts-with(@class, 'Nx9bqj')]")
-                    product["price"] = price_elem.text.strip()
-                except Exception:
-                    product["price"] = "N/A"
-
-                try:
-                    rating_elem = link.find_element(By.XPATH, "./ancestor::div[@data-id]//div[contains(@class, 'XQDdHH')]")
-                    product["rating"] = rating_elem.text.strip()
-                except Exception:
-                    product["rating"] = "No Rating"
-
-                if not product["image"]:
-                    try:
-                        image_elem = link.find_element(By.XPATH, "./ancestor::div[@data-id]//img")
-                        product["image"] = image_elem.get_attribute("src") or ""
-                    except Exception:
-                        product["image"] = ""
+        for card in cards:
+            if not card["href"] or "/p/" not in card["href"]:
+                continue
 
-                results.append(product)
+            results.append(_to_result(card))
 
-                if len(results) >= max_results:
-                    break
-
-            except Exception as e:
-                logger.warning(f"\u26a0\ufe0f Error parsing a product link: {e}")
-                continue
+            if len(results) >= max_results:
+                break
 
     except Exception as e:
         driver.save_screenshot("flipkart_error.png")
         logger.exception(f"\u274c Flipkart scraping failed: {e}")
         raise e
 
-    finally:
-        driver.quit()
-        logger.info("\ud83d\udea9 WebDriver closed")
-
-    # ✅ Save to CSV without duplicates
-    csv_path = os.path.join(os.getcwd(), "data","flipkart_results.csv")
-    existing_links = set()
-    if os.path.exists(csv_path):
-        try:
-            with open(csv_path, mode="r", encoding="utf-8") as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    existing_links.add(row["link"])
-        except Exception as e:
-            logger.error(f"⚠️ Failed to read existing CSV: {e}")
-
-    unique_new_results = [item for item in results if item["link"] not in existing_links]
-
-    if unique_new_results:
-        try:
-            file_exists = os.path.exists(csv_path)
-            with open(csv_path, mode="a", newline="", encoding="utf-8") as file:
-                writer = csv.DictWriter(file, fieldnames=["title", "price", "rating", "link", "image"])
-                if not file_exists:
-                    writer.writeheader()
-                writer.writerows(unique_new_results)
-            logger.info(f"\U0001F4C2 {len(unique_new_results)} new results appended to {csv_path}")
-        except Exception as e:
-            logger.error(f"\u274c Failed to append results to CSV: {e}")
-    else:
-        logger.info("✅ No new unique results to append.")
-
     return results
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scrapers.extract import parse_cards
+from scrapers.stages import stage
+
+logger = logging.getLogger(__name__)
+
+HTTP_FIRST = os.getenv("SCRAPER_HTTP_FIRST", "1") == "1"
+HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "8"))
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+}
+
+CAPTCHA_MARKERS = ("captcha", "automated access", "robot check")
+JS_ONLY_MARKERS = ("enable javascript", "javascript is disabled", "requires javascript")
+
+# Keep-alive connections shared by every scraper thread
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=0)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+_lock = threading.Lock()
+_tiers = {}  # site -> {"http": n, "browser": n, "fallback_reasons": {reason: n}}
+
+
+def fetch_cards(site, url, card_xpaths, fields):
+    """Fetch ``url`` over plain HTTP and parse its cards, or return ``None``.
+
+    ``None`` means the page cannot be served without a browser: the request
+    failed, hit a CAPTCHA, had no cards, or only renders with JavaScript.
+    """
+    if not HTTP_FIRST:
+        return None
+    try:
+        with stage("page_load"):
+            response = _session.get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException as e:
+        return _fallback(site, "request_error", str(e))
+    if response.status_code != 200:
+        return _fallback(site, f"http_{response.status_code}")
+
+    html = response.text
+    lowered = html.lower()
+    with stage("captcha_check") as span:
+        if any(marker in lowered for marker in CAPTCHA_MARKERS):
+            span.outcome = "captcha"
+    if span.outcome == "captcha":
+        return _fallback(site, "captcha")
+
+    try:
+        with stage("parse"):
+            cards = parse_cards(html, card_xpaths, fields, response.url)
+    except Exception as e:
+        return _fallback(site, "parse_error", str(e))
+    if not cards:
+        reason = "js_only" if any(marker in lowered for marker in JS_ONLY_MARKERS) else "empty"
+        return _fallback(site, reason)
+    return cards
+
+
+def _fallback(site, reason, detail=""):
+    logger.info(f"↩️ {site}: HTTP tier fell back to browser ({reason}) {detail}".rstrip())
+    with _lock:
+        stats = _tiers.setdefault(site, {"http": 0, "browser": 0, "fallback_reasons": {}})
+        stats["fallback_reasons"][reason] = stats["fallback_reasons"].get(reason, 0) + 1
+    return None
+
+
+def record_tier(site, tier):
+    """Count which tier ("http" or "browser") served a search for ``site``."""
+    logger.info(f"🛰️ {site} served by {tier} tier")
+    with _lock:
+        stats = _tiers.setdefault(site, {"http": 0, "browser": 0, "fallback_reasons": {}})
+        stats[tier] += 1
+
+
+def tier_stats():
+    """Searches served by each tier per site, and why the HTTP tier fell back."""
+    with _lock:
+        return {
+            site: dict(stats, fallback_reasons=dict(stats["fallback_reasons"]))
+            for site, stats in _tiers.items()
+        }
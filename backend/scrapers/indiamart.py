@@ -1,106 +1,121 @@
 # Save this file as indiamart.py
 import os
-import csv
 import logging
 import time
-import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options
+from scrapers.product_store import ProductStore
+from scrapers.normalize import normalize_results
+from scrapers.driver_pool import DriverProfile, lease_driver
+from scrapers.resource_blocking import blocking_options, record_page_weight
+from scrapers.extract import extract_cards, has_class
+from scrapers.http_fetch import fetch_cards, record_tier
+from scrapers.stages import stage, track
+from scrapers.errors import CaptchaError
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# 🧪 Point at a local stand-in with e.g. INDIAMART_BASE_URL=http://127.0.0.1:8765/indiamart
+BASE_URL = os.getenv("INDIAMART_BASE_URL", "https://dir.indiamart.com").rstrip("/")
+
 DEBUG_FOLDER = r"C:\Users\HP\Desktop\AI price comparison\screenshots\debug"
 CSV_FILE = r"C:\Users\HP\Desktop\AI price comparison\data\products.csv"
 
-def create_driver():
-    options = Options()
-    options.headless = True
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36")
-
-    driver_path = ChromeDriverManager().install()
-    return uc.Chrome(driver_executable_path=driver_path, options=options)
-
-def save_to_csv(results):
-    fieldnames = ["site", "title", "price", "link", "supplier", "rating", "image"]
-    existing_rows = []
-
-    if os.path.exists(CSV_FILE):
-        with open(CSV_FILE, mode='r', encoding='utf-8') as csvfile:
-            existing_rows = list(csv.DictReader(csvfile))
+PROFILE = DriverProfile(
+    engine="uc",
+    arguments=(
+        "--headless=new",
+        "--disable-blink-features=AutomationControlled",
+        "--window-size=1920,1080",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+    ),
+    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36",
+    **blocking_options("indiamart"),
+)
 
-    existing_set = set((row["title"], row["link"]) for row in existing_rows)
-    new_rows = [r for r in results if (r["title"], r["link"]) not in existing_set]
+STORE = ProductStore(CSV_FILE, ["site", "title", "price", "link", "supplier", "rating", "image"])
 
-    if not new_rows:
-        logger.info("📎 No new products to add.")
-        return
-
-    with open(CSV_FILE, mode='a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not existing_rows:
-            writer.writeheader()
-        for result in new_rows:
-            writer.writerow(result)
-
-    logger.info(f"✅ {len(new_rows)} new products saved to CSV.")
+def search_url(query):
+    return f"{BASE_URL}/search.mp?ss={query.replace(' ', '+')}"
 
 def scrape_indiamart(query, max_results=15):
-    driver = create_driver()
+    with track("indiamart"):
+        # The directory page is server-rendered, so try it without a browser first
+        cards = fetch_cards("indiamart", search_url(query), CARD_XPATHS, CARD_FIELDS)
+        if cards:
+            results = _to_results(cards)
+            record_tier("indiamart", "http")
+        else:
+            with lease_driver(PROFILE) as driver:
+                results = _scrape_page(driver, query)
+            record_tier("indiamart", "browser")
+
+        normalize_results(results)
+        # Save results to CSV always (frontend or terminal)
+        if results:
+            STORE.append(results)
+        return results
+
+CARD_XPATHS = [f"//*[{has_class('card')} and {has_class('brs5')}]"]
+
+CARD_FIELDS = {
+    "title": f".//*[{has_class('producttitle')}]//a",
+    "link": f".//*[{has_class('producttitle')}]//a/@href",
+    "price": f".//p[{has_class('price')}]",
+    "supplier": f".//*[{has_class('companyname')}]//a",
+    "rating": f".//*[{has_class('ratingValue')}]",
+    "image": f".//img[{has_class('productimg')}]/@src",
+}
+
+def _to_result(card):
+    return {
+        "site": "Indiamart",
+        "title": card["title"],
+        "price": card["price"] or "Ask Price",
+        "link": card["link"],
+        "supplier": card["supplier"] or "Unknown Supplier",
+        "rating": card["rating"] or "No Rating",
+        "image": card["image"],
+    }
+
+def _to_results(cards):
+    results = []
+    for card in cards:
+        if not card["title"]:
+            logger.warning("⚠️ Error parsing block: no product title")
+            continue
+        results.append(_to_result(card))
+    return results
+
+def _scrape_page(driver, query):
     results = []
     try:
         os.makedirs(DEBUG_FOLDER, exist_ok=True)
-        search_url = f"https://dir.indiamart.com/search.mp?ss={query.replace(' ', '+')}"
-        logger.info(f"🌐 Searching IndiaMART: {search_url}")
+        url = search_url(query)
+        logger.info(f"🌐 Searching IndiaMART: {url}")
 
-        for attempt in range(3):
-            driver.get(search_url)
+        with stage("page_load"):
+            driver.get(url)
+        # No retrying here: the site's circuit breaker backs off across requests instead
+        with stage("captcha_check"):
             try:
                 WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.ID, "px-captcha")))
-                logger.warning("⚠️ CAPTCHA detected! Retrying after 15s...")
-                time.sleep(15)
             except TimeoutException:
                 logger.info("✅ No CAPTCHA detected.")
-                break
-        else:
-            logger.error("❌ CAPTCHA Failed after retries.")
-            return []
+            else:
+                raise CaptchaError("indiamart", "⚠️ CAPTCHA encountered on IndiaMART")
 
         WebDriverWait(driver, 40).until(EC.presence_of_element_located((By.CSS_SELECTOR, '.card.brs5')))
+        record_page_weight(driver, "indiamart")
 
-        product_blocks = driver.find_elements(By.CSS_SELECTOR, '.card.brs5')
-        logger.info(f"🔍 Found {len(product_blocks)} products")
+        cards = extract_cards(driver, CARD_XPATHS, CARD_FIELDS)
+        logger.info(f"🔍 Found {len(cards)} products")
 
-        for item in product_blocks:
-            try:
-                title = item.find_element(By.CSS_SELECTOR, ".producttitle a").text.strip()
-                link = item.find_element(By.CSS_SELECTOR, ".producttitle a").get_attribute('href')
-                price = item.find_element(By.CSS_SELECTOR, "p.price").text.strip() if item.find_elements(By.CSS_SELECTOR, "p.price") else "Ask Price"
-                supplier = item.find_element(By.CSS_SELECTOR, ".companyname a").text.strip() if item.find_elements(By.CSS_SELECTOR, ".companyname a") else "Unknown Supplier"
-                rating = item.find_element(By.CSS_SELECTOR, ".ratingValue").text.strip() if item.find_elements(By.CSS_SELECTOR, ".ratingValue") else "No Rating"
-                image = item.find_element(By.CSS_SELECTOR, "img.productimg").get_attribute('src') if item.find_elements(By.CSS_SELECTOR, "img.productimg") else ""
-
-                results.append({
-                    "site": "Indiamart",
-                    "title": title,
-                    "price": price,
-                    "link": link,
-                    "supplier": supplier,
-                    "rating": rating,
-                    "image": image,
-                })
-            except Exception as e:
-                logger.warning(f"⚠️ Error parsing block: {e}")
-                continue
+        results = _to_results(cards)
 
     except Exception as e:
         logger.exception("❌ Error during scraping")
@@ -111,12 +126,7 @@ def scrape_indiamart(query, max_results=15):
             logger.info(f"📸 Screenshot saved at {screenshot_path}")
         except Exception as ss_e:
             logger.error(f"⚠️ Screenshot failed: {ss_e}")
-    finally:
-        driver.quit()
-
-    # Save results to CSV always (frontend or terminal)
-    if results:
-        save_to_csv(results)
+        raise
     return results
 
 # This is only triggered if run directly
@@ -1,164 +1,129 @@
-import time
 import os
 import logging
 import traceback
-import chromedriver_autoinstaller
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import undetected_chromedriver as uc
-import csv
+from scrapers.product_store import ProductStore
+from scrapers.normalize import normalize_results
+from scrapers.driver_pool import DriverProfile, lease_driver
+from scrapers.resource_blocking import blocking_options, record_page_weight
+from scrapers.extract import extract_cards, has_class
+from scrapers.scrolling import scroll_until_settled
+from scrapers.stages import stage, track
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 🧪 Point at a local stand-in with e.g. MEESHO_BASE_URL=http://127.0.0.1:8765/meesho
+BASE_URL = os.getenv("MEESHO_BASE_URL", "https://www.meesho.com").rstrip("/")
+
 CSV_FILE = r"C:\Users\HP\Desktop\AI price comparison\data\meesho_data.csv"
 
-def save_to_csv(results):
-    fieldnames = ["site", "title", "price", "link", "rating", "image"]
-    existing_rows = []
-
-    if os.path.exists(CSV_FILE):
-        with open(CSV_FILE, mode='r', encoding='utf-8') as csvfile:
-            existing_rows = list(csv.DictReader(csvfile))
-
-    existing_set = set((row["title"], row["link"]) for row in existing_rows)
-    new_rows = [r for r in results if (r["title"], r["link"]) not in existing_set]
-
-    if not new_rows:
-        logger.info("📎 No new products to add.")
-        return
-
-    with open(CSV_FILE, mode='a', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        if not existing_rows:
-            writer.writeheader()
-        for result in new_rows:
-            writer.writerow(result)
-
-    logger.info(f"✅ {len(new_rows)} new products saved to CSV.")
-
-def safe_uc_driver(options):
-    try:
-        return uc.Chrome(options=options)
-    except FileExistsError:
-        logger.warning("⚠️ Chrome already patched. Retrying with patch skipped...")
-        uc_exe = os.path.expanduser("~\\appdata\\roaming\\undetected_chromedriver\\undetected_chromedriver.exe")
-        if os.path.exists(uc_exe):
-            return uc.Chrome(options=options, driver_executable_path=uc_exe)
-        else:
-            raise FileNotFoundError("Undetected ChromeDriver binary not found.")
+STORE = ProductStore(CSV_FILE, ["site", "title", "price", "link", "rating", "image"])
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+)
+
+def _configure_session(driver):
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setUserAgentOverride", {"userAgent": USER_AGENT})
+    driver.execute_cdp_cmd("Network.setExtraHTTPHeaders", {
+        "headers": {
+            "Referer": "https://www.google.com/",
+            "Accept-Language": "en-US,en;q=0.9"
+        }
+    })
+
+PROFILE = DriverProfile(
+    engine="uc",
+    arguments=(
+        "--headless=new",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-blink-features=AutomationControlled",
+        "--window-size=1920,1080",
+        "--disable-gpu",
+        "--disable-extensions",
+    ),
+    user_agent=USER_AGENT,
+    page_load_strategy="eager",
+    on_create=_configure_session,
+    **blocking_options("meesho"),
+)
 
 def scrape_meesho(query):
     logger.info(f"🔍 Query: {query}")
-    search_url = f"https://www.meesho.com/search?q={query}"
+    search_url = f"{BASE_URL}/search?q={query}"
     logger.info(f"🌐 URL: {search_url}")
 
-    chromedriver_autoinstaller.install()
-
-    options = uc.ChromeOptions()
-    options.add_argument("--headless=new")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-extensions")
-    options.page_load_strategy = 'eager'
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-        "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
-    )
-
     results = []
-    driver = None
-
-    try:
-        driver = safe_uc_driver(options)
-
-        driver.execute_cdp_cmd("Network.enable", {})
-        driver.execute_cdp_cmd("Network.setUserAgentOverride", {
-            "userAgent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                         "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
-        })
-        driver.execute_cdp_cmd("Network.setExtraHTTPHeaders", {
-            "headers": {
-                "Referer": "https://www.google.com/",
-                "Accept-Language": "en-US,en;q=0.9"
-            }
-        })
 
-        driver.get(search_url)
-        time.sleep(1)  # brief pause to allow basic rendering
-
-
-        for _ in range(2):
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1.2)
-
-        product_cards = driver.find_elements(By.CSS_SELECTOR, "div.NewProductCardstyled__StyledDetailsCard-sc-6y2tys-1")
-        if not product_cards:
-            product_cards = driver.find_elements(By.CSS_SELECTOR, "div.sc-cWSHoV")
-
-        logger.info(f"📦 Total cards found: {len(product_cards)}")
-
-        for card in product_cards[:15]:
-            try:
-                title = card.find_element(By.CSS_SELECTOR, "p.NewProductCardstyled__StyledDesktopProductTitle-sc-6y2tys-5").text.strip()
-            except:
-                title = "N/A"
-
-            try:
-                price = card.find_element(By.CSS_SELECTOR, "h5.sc-eDvSVe").text.strip()
-            except:
-                price = "N/A"
-
-            link = ""
-            image = ""
-            try:
-                parent = card.find_element(By.XPATH, ".//ancestor::a[1]")
-                link = parent.get_attribute("href") if parent else ""
-                img_elem = parent.find_element(By.TAG_NAME, "img")
-                image = img_elem.get_attribute("src") if img_elem else ""
-            except:
+    with track("meesho"):
+        try:
+            with lease_driver(PROFILE) as driver:
                 try:
-                    link_elem = card.find_element(By.TAG_NAME, "a")
-                    link = link_elem.get_attribute("href")
-                    image = link_elem.find_element(By.TAG_NAME, "img").get_attribute("src")
-                except:
-                    pass
-
-            try:
-                rating = card.find_element(By.CSS_SELECTOR, "div.NewProductCardstyled__RatingsRow-sc-6y2tys-8 span").text.strip()
-            except:
-                rating = "N/A"
-
-            results.append({
-                "site": "meesho",
-                "title": title,
-                "price": price,
-                "link": link,
-                "rating": rating,
-                "image": image
-            })
-
-            logger.info(f"✅ {title} | {price} | {rating}")
-    except Exception as e:
-        logger.error("❌ Scraping failed:")
-        traceback.print_exc()
-        if driver:
-            driver.save_screenshot("meesho_error.png")
-            logger.info("📸 Screenshot saved as meesho_error.png")
-    finally:
-        if driver:
-            driver.quit()
-            logger.info("🧹 Driver closed.")
-
-    if not results:
-        logger.warning("🚨 No results returned.")
-    save_to_csv(results)
-    return results
+                    _collect_cards(driver, search_url, results)
+                except Exception:
+                    driver.save_screenshot("meesho_error.png")
+                    logger.info("📸 Screenshot saved as meesho_error.png")
+                    raise
+        except Exception as e:
+            logger.error("❌ Scraping failed:")
+            traceback.print_exc()
+            if not results:
+                raise  # let the caller (and the site's circuit breaker) see it
+
+        if not results:
+            logger.warning("🚨 No results returned.")
+        normalize_results(results)
+        STORE.append(results)
+        return results
+
+MAX_RESULTS = 15
+
+CARD_XPATHS = [
+    f"//div[{has_class('NewProductCardstyled__StyledDetailsCard-sc-6y2tys-1')}]",
+    f"//div[{has_class('sc-cWSHoV')}]",
+]
+
+CARD_FIELDS = {
+    "title": f".//p[{has_class('NewProductCardstyled__StyledDesktopProductTitle-sc-6y2tys-5')}]",
+    "price": f".//h5[{has_class('sc-eDvSVe')}]",
+    "parent_link": ".//ancestor::a[1]/@href",
+    "parent_image": ".//ancestor::a[1]//img/@src",
+    "child_link": ".//a/@href",
+    "child_image": ".//a//img/@src",
+    "rating": f".//div[{has_class('NewProductCardstyled__RatingsRow-sc-6y2tys-8')}]//span",
+}
+
+def _to_result(card):
+    if card["parent_link"]:
+        link, image = card["parent_link"], card["parent_image"]
+    else:
+        link, image = card["child_link"], card["child_image"]
+
+    return {
+        "site": "meesho",
+        "title": card["title"] or "N/A",
+        "price": card["price"] or "N/A",
+        "link": link,
+        "rating": card["rating"] or "N/A",
+        "image": image
+    }
+
+def _collect_cards(driver, search_url, results):
+    with stage("page_load"):
+        driver.get(search_url)
+    scroll_until_settled(driver, "Meesho", CARD_XPATHS, target=MAX_RESULTS, legacy_wait=3.4)
+    record_page_weight(driver, "meesho")
+
+    cards = extract_cards(driver, CARD_XPATHS, CARD_FIELDS)
+    logger.info(f"📦 Total cards found: {len(cards)}")
 
+    for card in cards[:MAX_RESULTS]:
+        result = _to_result(card)
+        results.append(result)
+        logger.info(f"✅ {result['title']} | {result['price']} | {result['rating']}")
 
 if __name__ == "__main__":
     query = input("🔍 Enter product name: ").strip()
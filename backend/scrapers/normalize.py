@@ -0,0 +1,73 @@
+import pandas as pd
+
+# First number in the text: "₹1,299.00", "₹ 250/Piece", "₹200 - ₹300" (takes 200)
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)"
+# "4.2 out of 5 stars", "4.3", "3.9 ★"
+_RATING = r"(\d+(?:\.\d+)?)"
+# "1,234 ratings", "(56 reviews)" inside a rating string
+_REVIEWS_IN_TEXT = r"(?i)([\d,]*\d)\s*(?:ratings?|reviews?)"
+# A dedicated reviews field: "(1,234)", "1,234"
+_REVIEWS = r"([\d,]*\d)"
+
+PLACEHOLDER_TITLES = ("", "No Title", "No Title Found")
+PLACEHOLDER_LINKS = ("", "#")
+
+NUMERIC_FIELDS = ("price_paise", "rating_value", "review_count", "valid")
+
+
+def _text(df, column):
+    if column in df:
+        return df[column].astype("string")
+    return pd.Series(pd.NA, index=df.index, dtype="string")
+
+
+def _number(text, pattern):
+    digits = text.str.extract(pattern, expand=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(digits, errors="coerce")
+
+
+def normalize_frame(df):
+    """Numeric columns parsed from a frame of scraped rows, in one pass per column.
+
+    Returns a frame on ``df``'s index with ``price_paise`` (``Int64``, price in
+    paise), ``rating_value`` (float out of 5), ``review_count`` (``Int64``)
+    and ``valid`` (a usable title, link and price). Unparseable values such
+    as "Ask Price" or "No Rating" become ``<NA>``/``NaN``.
+    """
+    price = _number(_text(df, "price"), _AMOUNT)
+    rating_text = _text(df, "rating")
+    rating = _number(rating_text, _RATING)
+
+    reviews = _number(rating_text, _REVIEWS_IN_TEXT)
+    if "reviews" in df:
+        reviews = _number(_text(df, "reviews"), _REVIEWS).fillna(reviews)
+
+    title = _text(df, "title").fillna("").str.strip()
+    link = _text(df, "link").fillna("").str.strip()
+    price_paise = (price * 100).round().astype("Int64")
+    valid = (
+        (price_paise > 0).fillna(False)
+        & ~title.isin(PLACEHOLDER_TITLES)
+        & ~link.isin(PLACEHOLDER_LINKS)
+    ).astype(bool)
+
+    return pd.DataFrame({
+        "price_paise": price_paise,
+        "rating_value": rating.where(rating.between(0, 5)).astype("float64"),
+        "review_count": reviews.round().astype("Int64"),
+        "valid": valid,
+    }, index=df.index)
+
+
+def normalize_results(results):
+    """Add the ``normalize_frame`` fields to each scraped result dict, with ``None`` for missing values."""
+    if not results:
+        return results
+    numeric = normalize_frame(pd.DataFrame(results))
+    columns = [
+        numeric[name].astype(object).where(numeric[name].notna(), None).tolist()
+        for name in NUMERIC_FIELDS
+    ]
+    for result, values in zip(results, zip(*columns)):
+        result.update(zip(NUMERIC_FIELDS, values))
+    return results
@@ -0,0 +1,135 @@
+import csv
+import hashlib
+import logging
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from scrapers.stages import stage
+
+logger = logging.getLogger(__name__)
+
+
+def row_key(row, key_fields):
+    """Stable digest of the fields that identify a product row."""
+    raw = "\x1f".join(str(row.get(field) or "") for field in key_fields)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _FileLock:
+    """Exclusive lock on ``path`` shared with other processes writing the same store."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+
+
+class ProductStore:
+    """Append-only product CSV that skips rows it already holds.
+
+    The digests of every stored row's ``key_fields`` live in a ``.keys``
+    sidecar next to the CSV. It is read once and then only from where this
+    process last stopped, so an append costs O(new rows) however large the
+    CSV gets. Appends are serialised across threads and processes by a lock
+    file; the sidecar is rebuilt from the CSV if the CSV was changed by hand.
+    """
+
+    def __init__(self, path, fieldnames, key_fields=("title", "link")):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.key_fields = tuple(key_fields)
+        self.index_path = path + ".keys"
+        self._keys = set()
+        self._index_offset = 0  # bytes of the sidecar already in self._keys
+        self._lock = threading.Lock()
+
+    def _rebuild_index(self):
+        """Re-derive the sidecar from the CSV (first run or after an outside edit)."""
+        keys = []
+        if os.path.exists(self.path):
+            with open(self.path, mode="r", newline="", encoding="utf-8") as f:
+                keys = [row_key(row, self.key_fields) for row in csv.DictReader(f)]
+        with open(self.index_path, mode="w", encoding="ascii") as f:
+            f.writelines(key + "\n" for key in keys)
+        self._keys = set(keys)
+        self._index_offset = os.path.getsize(self.index_path)
+        logger.info(f"🗂️ Rebuilt dedup index for {self.path} ({len(self._keys)} rows)")
+
+    def _sync_index(self):
+        """Pick up keys appended since the last sync, by this or another process."""
+        if not os.path.exists(self.path):
+            if self._keys or os.path.exists(self.index_path):
+                self._rebuild_index()
+            return
+        if (not os.path.exists(self.index_path)
+                or os.path.getmtime(self.path) > os.path.getmtime(self.index_path)
+                or os.path.getsize(self.index_path) < self._index_offset):
+            self._rebuild_index()
+            return
+        with open(self.index_path, mode="rb") as f:
+            f.seek(self._index_offset)
+            for line in f:
+                self._keys.add(line.decode("ascii").strip())
+            self._index_offset = f.tell()
+
+    def append(self, rows):
+        """Append the rows not stored yet and return how many were written."""
+        with stage("persist"):
+            return self._append(rows)
+
+    def _append(self, rows):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock, _FileLock(self.path + ".lock"):
+            self._sync_index()
+            new_rows, new_keys = [], []
+            for row in rows:
+                key = row_key(row, self.key_fields)
+                if key in self._keys:
+                    continue
+                self._keys.add(key)
+                new_rows.append(row)
+                new_keys.append(key)
+
+            if not new_rows:
+                logger.info(f"📎 No new products to add to {self.path}.")
+                return 0
+
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, mode="a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction="ignore")
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(new_rows)
+            # Written after the CSV, so a crash in between only costs a rebuild
+            with open(self.index_path, mode="ab") as f:
+                f.writelines(f"{key}\n".encode("ascii") for key in new_keys)
+                self._index_offset = f.tell()
+
+        logger.info(f"✅ {len(new_rows)} new products saved to {self.path}.")
+        return len(new_rows)
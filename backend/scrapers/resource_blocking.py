@@ -0,0 +1,160 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from fnmatch import fnmatch
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_BLOCKING = os.getenv("SCRAPER_BLOCK_RESOURCES", "1") == "1"
+PAGE_WEIGHT_FILE = os.getenv("SCRAPER_PAGE_WEIGHT_FILE", os.path.join(os.getcwd(), "page_weight.json"))
+# Seconds between writes of the page weight file; it is also written at exit
+PAGE_WEIGHT_FLUSH_INTERVAL = float(os.getenv("SCRAPER_PAGE_WEIGHT_FLUSH_INTERVAL", "30"))
+
+# Patterns for CDP Network.setBlockedURLs (``*`` is a wildcard)
+BLOCKED_URL_PATTERNS = (
+    # images, fonts and media: we only read their src attributes
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    # ads and trackers
+    "*doubleclick.net*", "*googlesyndication.com*", "*google-analytics.com*",
+    "*googletagmanager.com*", "*googleadservices.com*", "*amazon-adsystem.com*",
+    "*facebook.net*", "*connect.facebook.com*", "*hotjar.com*", "*clarity.ms*",
+    "*scorecardresearch.com*", "*criteo.*", "*taboola.com*", "*branch.io*",
+)
+
+# Chrome prefs that stop images and media from being fetched or decoded at all
+BLOCKING_PREFS = (
+    ("profile.managed_default_content_settings.images", 2),
+    ("profile.managed_default_content_settings.media_stream", 2),
+)
+
+# Patterns each site needs to keep loading. Extend with BLOCK_ALLOW_<SITE>=pattern,pattern
+SITE_ALLOWLISTS = {
+    "amazon": (),
+    "flipkart": (),
+    "meesho": (),
+    "indiamart": (),
+}
+
+_PAGE_WEIGHT_JS = r"""
+const nav = performance.getEntriesByType("navigation")[0];
+const resources = performance.getEntriesByType("resource");
+let bytes = nav ? nav.transferSize : 0;
+for (const r of resources) bytes += r.transferSize || 0;
+return {
+  bytes: bytes,
+  load_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : 0,
+  requests: resources.length + 1
+};
+"""
+
+_lock = threading.Lock()
+_page_weight = None  # {site: {"blocked"|"unblocked": {"pages", "bytes", "load_ms"}}}
+_dirty = False
+_saved_at = time.monotonic()
+_write_lock = threading.Lock()  # keeps two flushes from interleaving in the file
+
+
+def allowlist(site):
+    extra = os.getenv(f"BLOCK_ALLOW_{site.upper()}", "")
+    return SITE_ALLOWLISTS.get(site, ()) + tuple(p.strip() for p in extra.split(",") if p.strip())
+
+
+def blocking_options(site):
+    """``DriverProfile`` keyword arguments that apply resource blocking for ``site``."""
+    if not RESOURCE_BLOCKING:
+        return {}
+    allowed = allowlist(site)
+    blocked = tuple(
+        pattern for pattern in BLOCKED_URL_PATTERNS
+        if not any(fnmatch(pattern, allow) for allow in allowed)
+    )
+    # Allowlisting images also has to lift the prefs that keep Chrome from fetching them
+    prefs = BLOCKING_PREFS if "*.jpg" in blocked else ()
+    return {"blocked_urls": blocked, "prefs": prefs}
+
+
+def _load_page_weight():
+    global _page_weight
+    if _page_weight is None:
+        try:
+            with open(PAGE_WEIGHT_FILE, encoding="utf-8") as f:
+                _page_weight = json.load(f)
+        except (OSError, ValueError):
+            _page_weight = {}
+    return _page_weight
+
+
+def record_page_weight(driver, site):
+    """Log what the current page cost and what blocking saved against the unblocked average."""
+    global _dirty
+    try:
+        sample = driver.execute_script(_PAGE_WEIGHT_JS) or {}
+    except Exception as e:
+        logger.debug(f"Page weight unavailable for {site}: {e}")
+        return
+
+    mode = "blocked" if RESOURCE_BLOCKING else "unblocked"
+    with _lock:
+        stats = _load_page_weight().setdefault(site, {})
+        totals = stats.setdefault(mode, {"pages": 0, "bytes": 0, "load_ms": 0})
+        totals["pages"] += 1
+        totals["bytes"] += int(sample.get("bytes") or 0)
+        totals["load_ms"] += int(sample.get("load_ms") or 0)
+        report = _site_report(stats)
+        _dirty = True
+    if time.monotonic() - _saved_at >= PAGE_WEIGHT_FLUSH_INTERVAL:
+        flush_page_weight()
+
+    message = f"🪶 {site}: {sample.get('bytes', 0) / 1024:.0f} KB, {sample.get('load_ms', 0) / 1000:.1f}s page load"
+    if "bytes_saved" in report:
+        message += (
+            f" (blocking saves ~{report['bytes_saved'] / 1024:.0f} KB"
+            f" and {report['load_ms_saved'] / 1000:.1f}s per page)"
+        )
+    logger.info(message)
+
+
+def flush_page_weight():
+    """Write the page weight totals if they changed since the last write."""
+    global _dirty, _saved_at
+    with _write_lock:
+        with _lock:
+            if not _dirty:
+                return
+            text = json.dumps(_page_weight)
+            _dirty = False
+            _saved_at = time.monotonic()
+        try:
+            with open(PAGE_WEIGHT_FILE, "w", encoding="utf-8") as f:
+                f.write(text)
+        except OSError as e:
+            logger.debug(f"Could not write {PAGE_WEIGHT_FILE}: {e}")
+
+
+atexit.register(flush_page_weight)
+
+
+def _site_report(stats):
+    report = {}
+    for mode, totals in stats.items():
+        pages = totals["pages"] or 1
+        report[mode] = {
+            "pages": totals["pages"],
+            "avg_bytes": totals["bytes"] // pages,
+            "avg_load_ms": totals["load_ms"] // pages,
+        }
+    if "blocked" in report and "unblocked" in report:
+        report["bytes_saved"] = report["unblocked"]["avg_bytes"] - report["blocked"]["avg_bytes"]
+        report["load_ms_saved"] = report["unblocked"]["avg_load_ms"] - report["blocked"]["avg_load_ms"]
+    return report
+
+
+def page_weight_report():
+    """Average bytes and load time per site with and without blocking, plus the savings."""
+    with _lock:
+        return {site: _site_report(stats) for site, stats in _load_page_weight().items()}
@@ -0,0 +1,59 @@
+import logging
+import os
+import random
+import time
+
+from scrapers.stages import stage
+
+logger = logging.getLogger(__name__)
+
+# 🤖 Random pauses between scrolls, only for sites that flag robotic timing
+HUMAN_JITTER = os.getenv("SCRAPER_HUMAN_JITTER", "0") == "1"
+SCROLL_CAP = float(os.getenv("SCRAPER_SCROLL_CAP", "4"))
+SCROLL_POLL = 0.25
+SETTLE_POLLS = 3  # unchanged non-zero card counts in a row mean loading is done
+
+# Scrolls to the bottom and returns how many cards match the first XPath that has any
+_SCROLL_JS = r"""
+const [cardXPaths] = arguments;
+window.scrollTo(0, document.body.scrollHeight);
+for (const xpath of cardXPaths) {
+  const count = document.evaluate(`count(${xpath})`, document, null, XPathResult.NUMBER_TYPE, null).numberValue;
+  if (count) return count;
+}
+return 0;
+"""
+
+
+def scroll_until_settled(driver, site, card_xpaths, target, legacy_wait, cap=SCROLL_CAP):
+    """Scroll until ``target`` cards are rendered or the count stops growing.
+
+    Gives up after ``cap`` seconds. ``legacy_wait`` is the average time the
+    old fixed sleeps took and is only used to log the time saved.
+    """
+    with stage("scroll"):
+        return _scroll(driver, site, card_xpaths, target, legacy_wait, cap)
+
+
+def _scroll(driver, site, card_xpaths, target, legacy_wait, cap):
+    started = time.monotonic()
+    last_count, stable = -1, 0
+    while True:
+        count = int(driver.execute_script(_SCROLL_JS, list(card_xpaths)) or 0)
+        if count >= target:
+            break
+        stable = stable + 1 if count and count == last_count else 0
+        if stable >= SETTLE_POLLS:
+            break
+        if time.monotonic() - started >= cap:
+            break
+        last_count = count
+        pause = SCROLL_POLL + (random.uniform(0.3, 1.0) if HUMAN_JITTER else 0)
+        time.sleep(pause)
+
+    waited = time.monotonic() - started
+    logger.info(
+        f"📜 {site}: {count} cards after {waited:.1f}s of scrolling "
+        f"(saved {legacy_wait - waited:.1f}s vs fixed sleeps)"
+    )
+    return count
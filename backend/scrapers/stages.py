@@ -0,0 +1,105 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from scrapers.errors import CaptchaError
+
+# Called with (site, stage, seconds, outcome) when a stage ends
+_listeners = []
+_local = threading.local()
+
+
+def add_listener(listener):
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def current_site():
+    return getattr(_local, "site", None)
+
+
+@contextmanager
+def track(site):
+    """Attribute the stages run by this thread to ``site`` until the block ends."""
+    previous = current_site()
+    _local.site = site
+    try:
+        yield
+    finally:
+        _local.site = previous
+
+
+def outcome_of(error, name):
+    """``captcha``, ``timeout``, ``parse_error`` or ``error`` for an exception raised in stage ``name``.
+
+    Exceptions may name their own outcome with an ``outcome`` attribute.
+    """
+    if getattr(error, "outcome", None):
+        return error.outcome
+    if isinstance(error, CaptchaError):
+        return "captcha"
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return "timeout"  # also selenium's TimeoutException and requests' Timeout
+    if name == "parse":
+        return "parse_error"
+    return "error"
+
+
+class Span:
+    """Handed to the ``with stage(...)`` block, which may set ``outcome`` itself (e.g. to ``captcha``)."""
+
+    __slots__ = ("outcome",)
+
+    def __init__(self):
+        self.outcome = "ok"
+
+
+@contextmanager
+def stage(name, site=None):
+    """Time one step of a scrape: ``driver_start``, ``page_load``, ``captcha_check``, ``scroll``...
+
+    Nothing is measured while no listener is registered.
+    """
+    span = Span()
+    if not _listeners:
+        yield span
+        return
+    started = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.outcome = outcome_of(e, name)
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        site = site or current_site() or "unknown"
+        for listener in list(_listeners):
+            listener(site, name, seconds, span.outcome)
+
+
+class StageRecorder:
+    """Collects stage durations per site, e.g. for a benchmark run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}  # site -> stage -> [seconds]
+        self.errors = {}   # site -> stage -> count
+
+    def __call__(self, site, name, seconds, outcome):
+        with self._lock:
+            self.samples.setdefault(site, {}).setdefault(name, []).append(seconds)
+            if outcome != "ok":
+                errors = self.errors.setdefault(site, {})
+                errors[name] = errors.get(name, 0) + 1
+
+    @contextmanager
+    def recording(self):
+        add_listener(self)
+        try:
+            yield self
+        finally:
+            remove_listener(self)
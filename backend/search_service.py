@@ -0,0 +1,246 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from scrapers import amazon, flipkart, meesho, indiamart
+from scrapers.amazon import scrape_amazon
+from scrapers.flipkart import scrape_flipkart
+from scrapers.meesho import scrape_meesho
+from scrapers.indiamart import scrape_indiamart
+from scrapers.driver_pool import POOL
+from scrapers.stages import outcome_of, stage
+from recommender import get_recommendations
+from result_cache import create_cache
+from product_db import ProductDB
+from matching import MatchIndex, compare
+from singleflight import SingleFlight
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from metrics import count_scrape
+
+logger = logging.getLogger(__name__)
+
+# ✅ Scrapers in the order their columns appear in the response
+SCRAPERS = {
+    "amazon": scrape_amazon,
+    "flipkart": scrape_flipkart,
+    "meesho": scrape_meesho,
+    "indiamart": scrape_indiamart,
+}
+
+# ⏱️ Deadlines in seconds, overridable per site with e.g. SEARCH_DEADLINE_AMAZON=20
+DEFAULT_SITE_DEADLINE = float(os.getenv("SEARCH_SITE_DEADLINE", "45"))
+OVERALL_DEADLINE = float(os.getenv("SEARCH_OVERALL_DEADLINE", "60"))
+SITE_DEADLINES = {
+    site: float(os.getenv(f"SEARCH_DEADLINE_{site.upper()}", DEFAULT_SITE_DEADLINE))
+    for site in SCRAPERS
+}
+
+# 🚦 Browser sessions allowed per site at once, e.g. SEARCH_CONCURRENCY_MEESHO=1
+_site_slots = {
+    site: threading.BoundedSemaphore(int(os.getenv(f"SEARCH_CONCURRENCY_{site.upper()}", "2")))
+    for site in SCRAPERS
+}
+
+# Shared pool: one slot per site per concurrent search, plus the recommender.
+# Timed-out scrapers keep their thread until the browser session ends, so the
+# pool is sized for a few overlapping searches.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_MAX_WORKERS", str(4 * (len(SCRAPERS) + 1)))),
+    thread_name_prefix="search",
+)
+
+
+# 🗃️ Per-site results keyed on "<site>:<normalized query>"
+CACHE = create_cache()
+
+# 🤝 Identical searches already running share one set of browser sessions
+FLIGHTS = SingleFlight()
+
+# 💾 Everything scraped so far; fresh local matches skip the browser entirely
+PRODUCTS = ProductDB()
+
+# 🔗 Every stored listing grouped by product, so each search is matched against the whole catalog
+MATCHES = MatchIndex()
+
+# 🧯 Sites answering with CAPTCHAs or timing out are skipped until they recover
+BREAKERS = {site: CircuitBreaker(site) for site in SCRAPERS}
+
+
+def warm_drivers():
+    """Pre-launch pooled browsers for every site so the first search is warm."""
+    for module in (amazon, flipkart, meesho, indiamart):
+        POOL.warm(module.PROFILE)
+
+
+def index_stored_products():
+    """Add every product in the local DB to ``MATCHES``; later scrapes are added as they are saved."""
+    started = time.monotonic()
+    try:
+        for items in PRODUCTS.iter_items():
+            MATCHES.add(items)
+    except Exception as e:
+        logger.error(f"⚠️ Could not index stored products for matching: {e}")
+        return
+    logger.info(f"🔗 Indexed {len(MATCHES)} stored products for matching in {time.monotonic() - started:.1f}s")
+
+
+def scrape_site(site, query):
+    """Results for one site, served from the cache or the local product DB when possible.
+
+    Cache misses for the same site and query are coalesced, so concurrent
+    duplicates wait for the scrape already in progress, and at most
+    ``SEARCH_CONCURRENCY_<SITE>`` scrapes of a site run at once. Local
+    matches newer than ``LOCAL_SEARCH_MAX_AGE_<SITE>`` are used instead of
+    scraping; scraped results are saved to the local DB.
+
+    A site whose circuit breaker is open is not scraped at all: its last
+    cached results or local matches of any age are returned instead, and
+    ``CircuitOpenError`` is raised when there are none.
+    """
+    key = f"{site}:{query}"
+    breaker = BREAKERS[site]
+
+    def scrape():
+        try:
+            local = PRODUCTS.fresh_results(site, query)
+        except Exception as e:
+            logger.error(f"⚠️ Local product lookup failed for {site}: {e}")
+            local = None
+        if local:
+            logger.info(f"💾 {site}: {len(local)} fresh local matches for '{query}'")
+            return local
+
+        if not breaker.allow():
+            raise CircuitOpenError(site, breaker.retry_in())
+        slot = _site_slots[site]
+        if not slot.acquire(timeout=SITE_DEADLINES[site]):
+            breaker.record_failure("busy")  # hands back a half-open probe
+            raise TimeoutError(f"{site} is busy with other searches")
+        started = time.monotonic()
+        try:
+            with stage("scrape", site=site):
+                items = SCRAPERS[site](query)
+        except Exception as e:
+            breaker.record_failure(outcome_of(e, "scrape"))
+            raise
+        finally:
+            slot.release()
+        # Judged once per scrape here, not by each coalesced request that gave up waiting on it
+        if time.monotonic() - started > SITE_DEADLINES[site]:
+            breaker.record_failure("timeout")
+        else:
+            breaker.record_success()
+
+        try:
+            PRODUCTS.upsert(site, items)
+        except Exception as e:
+            logger.error(f"⚠️ Could not save {site} results to the product DB: {e}")
+        MATCHES.add(dict(item, site=site) for item in items)
+        return items
+
+    def load():
+        return FLIGHTS.do(key, scrape, timeout=SITE_DEADLINES[site])
+
+    try:
+        return CACHE.get_or_load(key, load)
+    except CircuitOpenError as e:
+        stale = _stale_results(site, query, key)
+        if not stale:
+            raise
+        logger.info(f"🧯 {site}: serving {len(stale)} stored results while blocked ({e})")
+        return stale
+
+
+def _stale_results(site, query, key):
+    """The last results stored for ``site`` and ``query``, however old; never written back to the cache."""
+    cached = CACHE.peek(key)
+    if cached:
+        return cached
+    try:
+        return PRODUCTS.search(query, site=site)
+    except Exception as e:
+        logger.error(f"⚠️ Local product lookup failed for {site}: {e}")
+        return []
+
+
+def breaker_states():
+    return {site: breaker.snapshot() for site, breaker in BREAKERS.items()}
+
+
+def _recommend(query):
+    with stage("recommend", site="recommendations"):
+        return get_recommendations(query)
+
+
+def iter_search(query):
+    """Yield ``(name, items, error)`` for each site and the recommender as it finishes.
+
+    Everything runs concurrently. Each site gets its own deadline, capped by
+    the overall deadline; a site that misses it is yielded with an empty
+    list and a timeout error while the others carry on. Last comes
+    ``"comparisons"``: listings matched across sites with their cheapest offer.
+    """
+    started = time.monotonic()
+    site_results = {}
+    pending = {_executor.submit(scrape_site, site, query): site for site in SCRAPERS}
+    pending[_executor.submit(_recommend, query)] = "recommendations"
+    deadlines = {
+        name: min(SITE_DEADLINES.get(name, OVERALL_DEADLINE), OVERALL_DEADLINE)
+        for name in pending.values()
+    }
+
+    while pending:
+        elapsed = time.monotonic() - started
+        next_deadline = min(deadlines[name] for name in pending.values())
+        done, _ = wait(pending, timeout=max(0.0, next_deadline - elapsed), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = pending.pop(future)
+            try:
+                items = future.result()
+                if name in SCRAPERS:
+                    site_results[name] = items
+                    count_scrape(name, "ok")
+                yield name, items, None
+            except Exception as e:
+                logger.error(f"❌ {name} failed: {e}")
+                if name in SCRAPERS:
+                    count_scrape(name, outcome_of(e, "scrape"))
+                yield name, [], str(e)
+
+        elapsed = time.monotonic() - started
+        for future, name in list(pending.items()):
+            if elapsed >= deadlines[name]:
+                del pending[future]
+                logger.error(f"⏱️ {name} missed its {deadlines[name]:g}s deadline")
+                if name in SCRAPERS:
+                    count_scrape(name, "timeout")
+                yield name, [], f"Timed out after {deadlines[name]:g}s"
+
+    try:
+        yield "comparisons", compare(site_results, MATCHES), None
+    except Exception as e:
+        logger.error(f"❌ comparisons failed: {e}")
+        yield "comparisons", [], str(e)
+
+    logger.info(f"🏁 Search for '{query}' finished in {time.monotonic() - started:.1f}s")
+
+
+def run_search(query):
+    """Run every scraper and the recommender concurrently for ``query``.
+
+    A site that fails or misses its deadline is reported in
+    ``results["errors"]`` and the rest of the response is returned as usual.
+    """
+    results = {site: [] for site in SCRAPERS}
+    results["recommendations"] = []
+    results["comparisons"] = []
+    results["errors"] = {}
+
+    for name, items, error in iter_search(query):
+        results[name] = items
+        if error:
+            results["errors"][name] = error
+    return results
@@ -0,0 +1,55 @@
+import logging
+import threading
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait on the same future and receive the same result or
+    exception. The key is forgotten as soon as the call finishes, so a
+    failure is only shared with requests that were already waiting and the
+    next request starts a fresh attempt.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key, fn, timeout=None):
+        """Run ``fn()`` once per in-flight ``key`` and return its result.
+
+        Followers give up after ``timeout`` seconds with
+        ``concurrent.futures.TimeoutError``; the leader's call is unaffected.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            logger.info(f"🤝 Joining in-flight request for {key}")
+            return future.result(timeout=timeout)
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+        return future.result()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
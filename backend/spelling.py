@@ -0,0 +1,322 @@
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+
+import pandas as pd
+
+from catalog import SITE_FILES
+from history import HISTORY_FILE, read_appended
+
+logger = logging.getLogger(__name__)
+
+SPELL_INDEX_PATH = os.getenv("SPELL_INDEX_PATH", os.path.join(os.getcwd(), "spelling_index.pickle"))
+SPELL_MAX_DISTANCE = int(os.getenv("SPELL_MAX_DISTANCE", "2"))
+SPELL_PREFIX_LENGTH = int(os.getenv("SPELL_PREFIX_LENGTH", "7"))
+SPELL_CACHE_SIZE = int(os.getenv("SPELL_CACHE_SIZE", "4096"))
+SPELL_CHECK_INTERVAL = float(os.getenv("SPELL_CHECK_INTERVAL", "300"))
+SPELL_HISTORY_MIN_COUNT = int(os.getenv("SPELL_HISTORY_MIN_COUNT", "3"))
+
+MIN_CORRECTED_LENGTH = 3  # shorter words ("tv", "hp") are left alone
+SHORT_WORD_LENGTH = 4     # words this short get a single edit, "bot" -> "boat" but not "red" -> "realme"
+# Two edits are only applied to words this long; "beats" -> "boat" is just suggested,
+# since a valid word missing from the vocabulary is as likely as a typo
+LONG_WORD_LENGTH = 8
+# A known word seen fewer times than this is a likely typo that made it into a title or
+# the search history, and gives way to a neighbour one edit away seen this many times more
+RARE_WORD_COUNT = 3
+FREQUENT_NEIGHBOUR_RATIO = 20
+SNAPSHOT_VERSION = 2
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein (optimal string alignment) distance, or ``limit + 1`` once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SymSpell:
+    """Symmetric-delete spelling index.
+
+    Every vocabulary word is stored under each string reachable by deleting
+    up to ``max_distance`` characters from its prefix. A lookup generates the
+    same deletes of the misspelled word, so candidates come from a few dict
+    hits and only they are checked with the bounded edit distance.
+    """
+
+    def __init__(self, max_distance=SPELL_MAX_DISTANCE, prefix_length=SPELL_PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = {}
+        self.deletes = {}
+
+    def _deletes(self, word):
+        found = {word}
+        frontier = [word]
+        for _ in range(self.max_distance):
+            frontier = [w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))]
+            frontier = [w for w in frontier if w not in found]
+            found.update(frontier)
+        return found
+
+    def add(self, word, count=1):
+        if word in self.words:
+            self.words[word] += count
+            return
+        self.words[word] = count
+        for key in self._deletes(word[:self.prefix_length]):
+            self.deletes.setdefault(key, []).append(word)
+
+    def lookup(self, word, max_distance=None):
+        """The most frequent vocabulary word closest to ``word``, or ``None`` beyond ``max_distance``.
+
+        A rare vocabulary word is returned as is unless a neighbour one edit
+        away is ``FREQUENT_NEIGHBOUR_RATIO`` times more frequent.
+        """
+        known = self.words.get(word, 0)
+        if known >= RARE_WORD_COUNT:
+            return word
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        if known:
+            max_distance = min(max_distance, 1)
+        best, best_distance, best_count = None, max_distance + 1, 0
+        checked = {word}
+        for key in self._deletes(word[:self.prefix_length]):
+            for candidate in self.deletes.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                distance = edit_distance(word, candidate, min(best_distance, max_distance))
+                count = self.words[candidate]
+                if distance < best_distance or (distance == best_distance and count > best_count):
+                    best, best_distance, best_count = candidate, distance, count
+        if known:
+            return best if best_distance <= 1 and best_count >= FREQUENT_NEIGHBOUR_RATIO * known else word
+        return best if best_distance <= max_distance else None
+
+
+def source_signature():
+    """Size and mtime of every catalog CSV, to tell whether a snapshot is current."""
+    signature = []
+    for path in SITE_FILES:
+        try:
+            st = os.stat(path)
+            signature.append((path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            signature.append((path, None, None))
+    return signature
+
+
+def build_vocabulary():
+    """Word frequencies from catalog titles."""
+    counts = Counter()
+    for path in SITE_FILES:
+        if not os.path.exists(path):
+            continue
+        try:
+            titles = pd.read_csv(path, dtype=str, usecols=lambda column: column == "title")
+        except Exception as e:
+            logger.error(f"Failed to read titles from {path}: {e}")
+            continue
+        if "title" in titles:
+            for title in titles["title"].dropna():
+                counts.update(_WORD.findall(title.lower()))
+    return counts
+
+
+def build_index(signature=None):
+    index = SymSpell()
+    for word, count in build_vocabulary().items():
+        if len(word) >= 2:
+            index.add(word, count)
+    _save_snapshot(index, signature or source_signature())
+    return index
+
+
+def _save_snapshot(index, signature):
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "signature": signature,
+        "max_distance": index.max_distance,
+        "prefix_length": index.prefix_length,
+        "words": index.words,
+        "deletes": index.deletes,
+    }
+    tmp = f"{SPELL_INDEX_PATH}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, SPELL_INDEX_PATH)
+    except OSError as e:
+        logger.error(f"Could not write spelling snapshot {SPELL_INDEX_PATH}: {e}")
+
+
+def _load_snapshot(signature):
+    """The index from disk if it was built from the current sources with the current settings."""
+    try:
+        # Only ever written by _save_snapshot on this host
+        with open(SPELL_INDEX_PATH, "rb") as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    if (snapshot.get("version") != SNAPSHOT_VERSION
+            or snapshot.get("signature") != signature
+            or snapshot.get("max_distance") != SPELL_MAX_DISTANCE
+            or snapshot.get("prefix_length") != SPELL_PREFIX_LENGTH):
+        return None
+    index = SymSpell(snapshot["max_distance"], snapshot["prefix_length"])
+    index.words = snapshot["words"]
+    index.deletes = snapshot["deletes"]
+    return index
+
+
+def _add_history(index, words, totals):
+    """Adds searched ``words`` to ``index``: catalog words gain their counts,
+    other words join once ``totals`` reaches ``SPELL_HISTORY_MIN_COUNT``,
+    so a typo searched once or twice is still corrected.
+    """
+    changed = False
+    for word, count in words.items():
+        if len(word) < 2:
+            continue
+        if word in index.words:
+            index.add(word, count)
+        elif totals[word] >= SPELL_HISTORY_MIN_COUNT:
+            index.add(word, totals[word])
+        else:
+            continue
+        changed = True
+    return changed
+
+
+class Speller:
+    """Keeps a ``SymSpell`` index in step with the catalog CSVs and search history.
+
+    The catalog part is loaded from the snapshot when the CSVs are
+    unchanged, otherwise rebuilt, and changed CSVs are noticed every
+    ``SPELL_CHECK_INTERVAL`` seconds and rebuilt in the background. Search
+    history is added on top: rows appended since the last check are read at
+    the same interval and added to the live index, which is never rebuilt
+    for them.
+    """
+
+    def __init__(self):
+        self.index = None
+        self.signature = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self.history = Counter()  # word -> times searched, since the history file was first read
+        self._history_offset = 0
+        self._history_tail = b""
+
+    def _read_history(self):
+        """Word counts of the history rows appended since the last call."""
+        try:
+            appended = read_appended(HISTORY_FILE, self._history_offset, self._history_tail)
+            if appended is None:
+                # Compacted or cleared: the rows kept were counted already, carry on from its end
+                appended = read_appended(HISTORY_FILE)
+                self._history_offset, self._history_tail = appended[1:]
+                return Counter()
+        except OSError:
+            return Counter()
+        rows, self._history_offset, self._history_tail = appended
+        words = Counter()
+        for row in rows:
+            words.update(_WORD.findall(row[1].lower()))
+        self.history.update(words)
+        return words
+
+    def load(self):
+        signature = source_signature()
+        started = time.monotonic()
+        index = _load_snapshot(signature)
+        if index is None:
+            index = build_index(signature)
+            logger.info(f"🔤 Built spelling index: {len(index.words)} words in {time.monotonic() - started:.1f}s")
+        else:
+            logger.info(f"🔤 Loaded spelling snapshot: {len(index.words)} words in {time.monotonic() - started:.2f}s")
+        _add_history(index, self._read_history(), self.history)
+        self._swap(index, signature)
+
+    def _swap(self, index, signature):
+        self.index, self.signature = index, signature
+        self._checked_at = time.monotonic()
+        _correct_query.cache_clear()
+
+    def _rebuild(self, signature):
+        try:
+            index = build_index(signature)
+            with self._lock:
+                _add_history(index, self.history, self.history)
+                self._swap(index, signature)
+            logger.info("🔤 Rebuilt spelling index after its sources changed")
+        except Exception as e:
+            logger.error(f"Spelling index rebuild failed: {e}")
+        finally:
+            self._rebuilding = False
+
+    def current(self):
+        if self.index is None:
+            with self._lock:
+                if self.index is None:
+                    self.load()
+        elif time.monotonic() - self._checked_at >= SPELL_CHECK_INTERVAL and not self._rebuilding:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                if _add_history(self.index, self._read_history(), self.history):
+                    _correct_query.cache_clear()
+                signature = source_signature()
+                if signature != self.signature and not self._rebuilding:
+                    self._rebuilding = True
+                    threading.Thread(target=self._rebuild, args=(signature,), daemon=True).start()
+        return self.index
+
+
+SPELLER = Speller()
+
+
+@lru_cache(maxsize=SPELL_CACHE_SIZE)
+def _correct_query(query):
+    index = SPELLER.index
+    corrected, suggested = [], []
+    for word in query.split():
+        fix = None
+        if len(word) >= MIN_CORRECTED_LENGTH and word.isalpha():
+            limit = 1 if len(word) <= SHORT_WORD_LENGTH else None
+            fix = index.lookup(word, limit)
+        suggested.append(fix or word)
+        sure = fix and (len(word) >= LONG_WORD_LENGTH or edit_distance(word, fix, 1) <= 1)
+        corrected.append(fix if sure else word)
+    corrected, suggested = " ".join(corrected), " ".join(suggested)
+    return corrected, suggested if suggested != corrected else None
+
+
+def correct_query(query):
+    """``(corrected, suggestion)`` for ``query``.
+
+    ``corrected`` replaces the unknown words that are one edit from a
+    vocabulary word (two for long words). ``suggestion`` also replaces the
+    less certain ones and is ``None`` when it would equal ``corrected``.
+    """
+    SPELLER.current()
+    return _correct_query(" ".join(query.lower().split()))
@@ -1,7 +1,7 @@
-from textblob import TextBlob
+from spelling import correct_query
 
 def correct_spelling(query):
+    """``(query to search, suggested query or None)``, see ``spelling.correct_query``."""
     if not query:
-        return ""
-    blob = TextBlob(query)
-    return str(blob.correct()).strip()
\ No newline at end of file
+        return "", None
+    return correct_query(query)
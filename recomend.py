@@ -1,33 +1,135 @@
-from flask import Flask, render_template, jsonify
-import pandas as pd
+from flask import Flask, render_template, jsonify, abort
+import numpy as np
+import csv
+import mmap
 import random
 import os
-from flask import Flask, render_template
+import threading
 
 
 app = Flask(__name__, template_folder='backend/templates',static_folder='static')
-DATA_DIR = r"C:\Users\HP\Desktop\AI price comparison\data"
+DATA_DIR = os.getenv("DATA_DIR", r"C:\Users\HP\Desktop\AI price comparison\data")
+
+
+class RowIndex:
+    """Byte offset of every row of one CSV, so any row is read with a single slice.
+
+    The file is memory-mapped and row starts are found with numpy: a newline
+    ends a row only when an even number of quotes precede it, which skips
+    newlines inside quoted fields. The index is checked against the file's
+    size and mtime on each access; appended rows are indexed incrementally,
+    anything else rebuilds it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = None
+
+    @staticmethod
+    def _row_bounds(data, base):
+        """Starts and ends of the non-blank rows in ``data`` from byte ``base``, a row boundary.
+
+        Also returns where the last newline-terminated row ends; a final row
+        without a newline is included but scanned again once more is appended.
+        """
+        buf = np.frombuffer(data, dtype=np.uint8, offset=base)  # a view of the mapping, not a copy
+        newlines = np.flatnonzero(buf == ord("\n"))
+        quotes = np.flatnonzero(buf == ord('"'))
+        ends = newlines[np.searchsorted(quotes, newlines) % 2 == 0] + 1
+        complete = int(ends[-1]) if len(ends) else 0
+        if complete < len(buf) and len(quotes) % 2 == 0:
+            ends = np.append(ends, len(buf))
+        starts = np.concatenate(([0], ends[:-1])).astype(np.int64)
+        keep = ends - starts > 2  # blank lines, "\n" or "\r\n"
+        return starts[keep] + base, ends[keep] + base, complete + base
+
+    def _load(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self._state = None
+            return None
+        signature = (st.st_size, st.st_mtime_ns)
+        state = self._state
+        if state and state["signature"] == signature:
+            return state
+        with self._lock:
+            state = self._state
+            if state and state["signature"] == signature:
+                return state
+            if not st.st_size:
+                self._state = None
+                return None
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            scanned = state["scanned"] if state else 0
+            tail = slice(max(0, scanned - 4096), scanned)
+            if state and scanned <= len(mm) and mm[tail] == state["mm"][tail]:
+                # Rows were appended: index only what follows the last complete row
+                header = state["header"]
+                keep = state["ends"] <= scanned
+                starts, ends = state["starts"][keep], state["ends"][keep]
+            else:
+                header, starts, ends, scanned = None, np.empty(0, np.int64), np.empty(0, np.int64), 0
+            new_starts, new_ends, scanned = self._row_bounds(mm, scanned)
+            if header is None:
+                if not len(new_starts):
+                    self._state = None
+                    return None
+                header = next(csv.reader([mm[new_starts[0]:new_ends[0]].decode("utf-8", errors="replace")]))
+                new_starts, new_ends = new_starts[1:], new_ends[1:]
+            self._state = {
+                "signature": signature,
+                "mm": mm,
+                "header": header,
+                "starts": np.concatenate([starts, new_starts]),
+                "ends": np.concatenate([ends, new_ends]),
+                "scanned": scanned,
+            }
+            return self._state
+
+    def __len__(self):
+        state = self._load()
+        return len(state["starts"]) if state else 0
+
+    def row(self, index):
+        """Row ``index`` (0 is the first after the header) as a dict, or ``None`` past the end."""
+        state = self._load()
+        if not state or not 0 <= index < len(state["starts"]):
+            return None
+        header = state["header"]
+        text = state["mm"][state["starts"][index]:state["ends"][index]].decode("utf-8", errors="replace")
+        values = next(csv.reader([text]), [])
+        return dict(zip(header, values + [""] * (len(header) - len(values))))
+
+    def random_row(self):
+        size = len(self)
+        return self.row(random.randrange(size)) if size else None
+
+
+SITES = ['amazon', 'flipkart', 'meesho', 'indiamart']
+INDEXES = {site: RowIndex(os.path.join(DATA_DIR, f"{site}.csv")) for site in SITES}
+
 
 # Load 1 random product from a specific site
 def load_one_product(site_name):
-    filepath = os.path.join(DATA_DIR, f"{site_name}.csv")
-    if os.path.exists(filepath):
-        df = pd.read_csv(filepath)
-        product = df.sample(1).to_dict('records')[0]
-        return product
-    return {}
+    index = INDEXES.get(site_name)
+    return (index.random_row() if index else None) or {}
 
 @app.route('/')
 def index():
     product_blocks = {}
-    for site in ['amazon', 'flipkart', 'meesho', 'indiamart']:
+    for site in SITES:
         product_blocks[site] = load_one_product(site)
     return render_template('index.html', product_blocks=product_blocks)
 
 @app.route('/product/<site>/<int:index>')
 def product_detail(site, index):
-    df = pd.read_csv(os.path.join(DATA_DIR, f"{site}.csv"))
-    product = df.iloc[index].to_dict()
+    product = INDEXES[site].row(index) if site in INDEXES else None
+    if product is None:
+        abort(404)
     return render_template('product.html', product=product)
 
 @app.route('/refresh/<site>')
@@ -35,5 +137,5 @@ def refresh_product(site):
     product = load_one_product(site)
     return jsonify(product)
 
-if __name__ == "__main__":  
-    app.run(debug=True, host="127.0.0.1", port=5000)
\ No newline at end of file
+if __name__ == "__main__":
+    app.run(debug=True, host="127.0.0.1", port=5000)
@@ -1,10 +1,16 @@
+const PRELOAD_SITES = ["amazon", "flipkart", "meesho", "indiamart"];
+
 async function loadPreloadedProducts() {
-    const res = await fetch("/preload_csv_products");
-    const data = await res.json();
     const container = document.getElementById("csv-products");
     container.innerHTML = "";
   
-    for (const site in data) {
+    for (const site of PRELOAD_SITES) {
+      const params = new URLSearchParams({ site, limit: 12, fields: "title,price,link,image,site" });
+      const res = await fetch(`/products?${params}`);
+      if (!res.ok) continue;
+      const data = await res.json();
+      if (!data.items.length) continue;
+
       const section = document.createElement("div");
       section.innerHTML = `<h3>${site.toUpperCase()}</h3>`;
       const grid = document.createElement("div");
@@ -12,18 +18,29 @@ async function loadPreloadedProducts() {
       grid.style.flexWrap = "wrap";
       grid.style.gap = "10px";
   
-      data[site].forEach(product => {
+      data.items.forEach(product => {
         const card = document.createElement("div");
         card.style.border = "1px solid #ddd";
         card.style.padding = "10px";
         card.style.width = "200px";
-        card.innerHTML = `
-          <a href="${product.product_url}" target="_blank">
-            <img src="${product.image_link}" alt="Product" style="width:100%">
-          </a>
-          <p><strong>Price:</strong> ${product.price}</p>
-          <p><strong>Site:</strong> ${product.site_name}</p>
-        `;
+
+        const link = document.createElement("a");
+        link.href = product.link;
+        link.target = "_blank";
+        const img = document.createElement("img");
+        img.src = product.image;
+        img.alt = product.title;
+        img.style.width = "100%";
+        link.appendChild(img);
+
+        const price = document.createElement("p");
+        price.innerHTML = "<strong>Price:</strong> ";
+        price.append(product.price);
+        const siteName = document.createElement("p");
+        siteName.innerHTML = "<strong>Site:</strong> ";
+        siteName.append(product.site);
+
+        card.append(link, price, siteName);
         grid.appendChild(card);
       });
   
@@ -33,4 +50,4 @@ async function loadPreloadedProducts() {
   }
   
   window.onload = loadPreloadedProducts;
-  
\ No newline at end of file
+  
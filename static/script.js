@@ -41,14 +41,17 @@ function startVoiceRecognition() {
 }
 
 // Main Search Function (✅ IndiaMART Added)
-async function searchProduct() {
+// exact: search the query as typed, without spelling correction
+async function searchProduct(exact = false) {
   const query = document.getElementById("productInput").value.trim();
   const amazonDiv = document.getElementById("amazonResults");
   const flipkartDiv = document.getElementById("flipkartResults");
   const meeshoDiv = document.getElementById("meeshoResults");
   const indiamartDiv = document.getElementById("indiamartResults"); // ✅ IndiaMART
   const recDiv = document.getElementById("recommendations");
+  const comparisonsDiv = document.getElementById("comparisons");
   const smartRecDiv = document.getElementById("smart-recommendations");
+  const correctedDiv = document.getElementById("correctedQuery");
 
   // Reset previous results
   amazonDiv.innerHTML = "<h2>Amazon</h2><div class='loader'>🔄 Searching...</div>";
@@ -57,6 +60,8 @@ async function searchProduct() {
   indiamartDiv.innerHTML = "<h2>IndiaMART</h2><div class='loader'>🔄 Searching...</div>";
   recDiv.innerHTML = "";
   smartRecDiv.innerHTML = "";
+  if (comparisonsDiv) comparisonsDiv.innerHTML = "";
+  if (correctedDiv) correctedDiv.textContent = "";
 
   if (!query) {
     showError(amazonDiv, "Please enter a product name");
@@ -69,25 +74,58 @@ async function searchProduct() {
   // 🔽 Save to Search History (Added)
   saveToHistory(query);
 
+  const columns = {
+    amazon: [amazonDiv, "Amazon"],
+    flipkart: [flipkartDiv, "Flipkart"],
+    meesho: [meeshoDiv, "Meesho"],
+    indiamart: [indiamartDiv, "IndiaMART"],
+  };
+
+  // Render one streamed event: a spelling correction, a site's results or the recommendations
+  const render = (event) => {
+    if ("corrected_query" in event || "suggested_query" in event) {
+      if (correctedDiv) displaySpelling(correctedDiv, query, event.corrected_query, event.suggested_query);
+      return;
+    }
+    if (event.source === "recommendations") {
+      if (event.items?.length) displayRecommendations(recDiv, smartRecDiv, event.items);
+      return;
+    }
+    if (event.source === "comparisons") {
+      if (comparisonsDiv && event.items?.length) displayComparisons(comparisonsDiv, event.items);
+      return;
+    }
+    const column = columns[event.source];
+    if (column) displayResults(column[0], column[1], event.items, event.error);
+  };
+
   try {
-    const response = await fetch("/search", {
+    const response = await fetch("/search/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ query })
+      body: JSON.stringify({ query, exact })
     });
 
     if (!response.ok) throw new Error(`Server error: ${response.status}`);
 
-    const data = await response.json();
-    console.log("🔁 Data received:", data);
-
-    displayResults(amazonDiv, "Amazon", data.amazon, data.errors?.amazon);
-    displayResults(flipkartDiv, "Flipkart", data.flipkart, data.errors?.flipkart);
-    displayResults(meeshoDiv, "Meesho", data.meesho, data.errors?.meesho);
-    displayResults(indiamartDiv, "IndiaMART", data.indiamart, data.errors?.indiamart);
-
-    if (data.recommendations?.length) {
-      displayRecommendations(recDiv, smartRecDiv, data.recommendations);
+    // 📡 Each line of the NDJSON body arrives as soon as its site finishes
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      const lines = buffer.split("\n");
+      buffer = lines.pop();
+      for (const line of lines) {
+        if (!line.trim()) continue;
+        const event = JSON.parse(line);
+        console.log("🔁 Data received:", event);
+        render(event);
+      }
     }
 
   } catch (err) {
@@ -99,6 +137,28 @@ async function searchProduct() {
   }
 }
 
+// "Showing results for ..." with a way back to the query as typed, and "Did you mean ...?"
+function displaySpelling(container, query, corrected, suggested) {
+  container.textContent = "";
+  const searchFor = (text, label) => {
+    const link = document.createElement("a");
+    link.href = "#";
+    link.textContent = label;
+    link.onclick = (e) => {
+      e.preventDefault();
+      document.getElementById("productInput").value = text;
+      searchProduct(true);
+    };
+    return link;
+  };
+  if (corrected) {
+    container.append(`Showing results for "${corrected}". Search instead for `, searchFor(query, query), ". ");
+  }
+  if (suggested) {
+    container.append("Did you mean ", searchFor(suggested, suggested), "?");
+  }
+}
+
 // Display Results Function
 function displayResults(container, siteName, items, error) {
   container.innerHTML = `<h2>${siteName}</h2>`;
@@ -158,6 +218,95 @@ function displayRecommendations(recDiv, smartRecDiv, recommendations) {
   });
 }
 
+// ⚖️ Same product found on several sites, cheapest offer first
+function displayComparisons(container, comparisons) {
+  container.innerHTML = "<h2>⚖️ Price Comparison</h2>";
+
+  comparisons.forEach(comparison => {
+    const group = document.createElement("div");
+    group.className = "comparison";
+
+    const title = document.createElement("h3");
+    title.textContent = comparison.title;
+    group.appendChild(title);
+
+    comparison.offers.forEach((offer, i) => {
+      const row = document.createElement("a");
+      row.className = i === 0 ? "comparison-offer cheapest" : "comparison-offer";
+      row.href = offer.link;
+      row.target = "_blank";
+      row.textContent = `${i === 0 ? "🏷️ " : ""}${offer.site}: ${offer.price || "N/A"}`;
+      group.appendChild(row);
+    });
+
+    container.appendChild(group);
+  });
+}
+
+// 📦 Catalog cards, fetched page by page from /products as the user scrolls
+function productCard(product) {
+  const card = document.createElement("div");
+  card.className = "product-card";
+
+  const img = document.createElement("img");
+  img.src = product.image;
+  img.alt = "Product Image";
+  img.loading = "lazy";
+
+  const title = document.createElement("h3");
+  title.textContent = product.title;
+
+  const price = document.createElement("p");
+  price.textContent = `Price: ${product.price}`;
+
+  const rating = document.createElement("p");
+  rating.textContent = `Rating: ${product.rating}`;
+
+  const link = document.createElement("a");
+  link.href = product.link;
+  link.target = "_blank";
+  link.textContent = "View";
+
+  card.append(img, title, price, rating, link);
+  return card;
+}
+
+function initCatalogScroll() {
+  const container = document.getElementById("catalogProducts");
+  const sentinel = document.getElementById("catalogSentinel");
+  if (!container || !sentinel || !("IntersectionObserver" in window)) return;
+
+  let cursor = container.dataset.nextCursor;
+  let loading = false;
+  const fields = "title,price,rating,link,image";
+
+  const observer = new IntersectionObserver(async (entries) => {
+    if (!entries.some(entry => entry.isIntersecting) || loading || !cursor) return;
+    loading = true;
+    try {
+      const params = new URLSearchParams({ cursor, fields });
+      const response = await fetch(`/products?${params}`);
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      const page = await response.json();
+      page.items.forEach(product => container.appendChild(productCard(product)));
+      cursor = page.next_cursor;
+    } catch (err) {
+      console.error("Loading more products failed:", err);
+    } finally {
+      loading = false;
+      if (!cursor) {
+        observer.disconnect();
+      } else {
+        // Re-observe so a sentinel that is still on screen triggers the next page
+        observer.unobserve(sentinel);
+        observer.observe(sentinel);
+      }
+    }
+  }, { rootMargin: "400px" });
+
+  if (cursor) observer.observe(sentinel);
+}
+
 // Display Error Message
 function showError(container, message) {
   container.innerHTML += `<div class="error">${message}</div>`;
@@ -222,6 +371,7 @@ document.addEventListener("DOMContentLoaded", () => {
   // Initialize Dark Mode and search history
   initDarkMode();
   renderSearchHistory(); // 🔄 Initialize Search History on load
+  initCatalogScroll();
 
   // Dark Mode toggle event listener
   const toggle = document.getElementById("darkModeToggle");